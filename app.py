@@ -3,36 +3,20 @@
 from __future__ import annotations
 
 import os
-import json
-import random
 import signal
-import time
-from datetime import datetime, timedelta
 
 from textual.color import Lab
 
 try:
-    from bs4 import BeautifulSoup
+    import httpx
 except ImportError:
-    raise ImportError("Please install bs4 with 'pip install bs4' ")
+    raise ImportError("Please install httpx with 'pip install httpx' ")
 
 try:
     from functools import partial
 except ImportError:
     raise ImportError("Please install functools with 'pip install functools' ")
 
-try:
-    import nltk
-    from nltk.inference import resolution
-    from nltk.corpus import wordnet
-except ImportError:
-    raise ImportError("Please install nltk with 'pip install nltk' ")
-
-try:
-    import httpx
-except ImportError:
-    raise ImportError("Please install httpx with 'pip install httpx' ")
-
 
 from rich.text import TextType
 from textual import work
@@ -40,169 +24,51 @@ from textual.binding import Binding
 from textual.app import App, ComposeResult
 from textual.color import Gradient
 from textual.reactive import reactive
-from textual.worker import Worker, get_current_worker
-from textual.containers import Horizontal, Vertical, VerticalScroll
-from textual.widgets import Button, Input, Label, Markdown, ProgressBar, Static, LoadingIndicator, Header, Footer, ContentSwitcher
+from textual.containers import Horizontal, Vertical
+from textual.widgets import Button, DataTable, Input, Label, ProgressBar, Static, LoadingIndicator, Header, Footer, ContentSwitcher, Select
 
-SECOND = 1000
-MAX_SCORE = 1000.0
-
-class Status:
-    started = 'started'
-    stopped = 'stopped'
+from engine import Solver
+from nearby import index_path as nearby_index_path
+from scorecache import cache_path as score_cache_path
+from lexicon import cache as lexical_cache
+from metrics import metrics
+from solver import MAX_SCORE, MODES
 
 GAME = {
     'en': {
         'name': 'English',
         'title': 'Cemantle',
         'code': 'eng',
-        'url': 'https://cemantle.certitudes.org',
+        'url': os.environ.get('CEMANTIX_EN_URL', 'https://cemantle.certitudes.org'),
         'flag': '🇬🇧',
-        'status': Status.stopped,
-        'markdown': '',
-        'words_tested': {},
-        'words_to_test': [],
-        'words_not_found': [],
-        'last_result': {},
-        'today_file_path': '',
-        'worker': None,
+        'solver': None,
     },
     'fr': {
         'name': 'French',
         'title': 'Cémantix',
         'code': 'fra',
-        'url': 'https://cemantix.certitudes.org',
+        'url': os.environ.get('CEMANTIX_FR_URL', 'https://cemantix.certitudes.org'),
         'flag': '🇫🇷',
-        'status': Status.stopped,
-        'markdown': '',
-        'words_tested': {},
-        'words_to_test': [],
-        'words_not_found': [],
-        'last_result': {},
-        'today_file_path': '',
-        'worker': None,
+        'solver': None,
     },
 }
 
 dict_path = 'Dicts'
 days_path = "Days"
+lexical_cache_path = f"{days_path}/lexical_cache.json"
+# Metrics are exported there, as JSON or Prometheus text for a .prom file, when set
+metrics_path = os.environ.get('CEMANTIX_METRICS')
+
+mode_names = {
+    'lifo': 'Newest first',
+    'best': 'Best first',
+    'vector': 'Word vectors',
+}
 
-markdown_leaderboard_header =  "| Pos  | Word               | Score      |\n"
-markdown_leaderboard_header += "| ---- | ------------------ | ---------- |\n"
-
-today_file = f"{datetime.strftime(datetime.now(), '%d-%m-%Y')}.txt"
-current_file_path = os.path.dirname(os.path.realpath(__file__)) + "/"
-
-def get_max_value(dictionary):
-    max_value = 0
-    max_key = ''
-    for key, value in dictionary.items():
-        if value > max_value:
-            max_value = value
-            max_key = key
-    return max_key, max_value
-
-
-def removeWordFromFile(file_path, word='', words=[]):
-    with open(file_path, mode="r", encoding="utf-8") as f:
-        word_list = f.read().splitlines()
-    if not word and not words:
-        word_list = list(set(word_list))
-    with open(file_path, mode="w", encoding="utf-8") as f:
-        for w in word_list:
-            if (word and w != word) or (words and w not in words) or (not word and not words):
-                f.write(w + "\n")
-
-
-def get_lexical_field(word, lang):
-    # Collect lexical field words
-    lexical_field = set()
-
-    try:
-        # Get synsets (sense groupings)
-        for synset in wordnet.synsets(word, lang=lang):
-            if not synset:
-                continue
-
-            # Add synonyms
-            for lemma in synset.lemmas(lang=lang):
-                lexical_field.add(lemma.name())
-            # Add hypernyms (broader terms)
-            for hypernym in synset.hypernyms():
-                lexical_field.update(lemma.name() for lemma in hypernym.lemmas(lang=lang))
-            # Add hyponyms (narrower terms)
-            for hyponym in synset.hyponyms():
-                lexical_field.update(lemma.name() for lemma in hyponym.lemmas(lang=lang))
-
-        lexical_field = [lf.replace('_', '-') for lf in list(lexical_field)]
-
-    except Exception as e:
-        with open('error.log', mode='a', encoding='utf-8') as f:
-            f.write(f'{word}: {e}\n')
-
-    return lexical_field
-
-
-def getRankings(words, ranking_size=25):
-    ranking = {}
-    markdown_leaderboard = ""
-
-    for word, value in words.items():
-        ranking[word] = value
-
-    # Sort the dictionary by value
-    ranking = sorted(ranking.items(), key=lambda x: x[1], reverse=True)
-
-    # Add rows to the Markdown table
-    for i, (word, value) in enumerate(ranking):
-        if i == ranking_size or value == 0:
-            break
-
-        markdown_leaderboard += f"| {str(i + 1) + '.':<4} | {word:<18} | {value:<10} |\n"
-
-    # Return the Markdown table
-    return markdown_leaderboard
-
-
-def loadDict(file_path):
-    if os.path.getsize(file_path) == 0:
-        return {}
-    with open(file_path, mode="r", encoding="utf-8") as f:
-        return json.load(f)
-
-
-def saveDict(file_path, words):
-    with open(file_path, mode="w", encoding="utf-8") as f:
-        json.dump(words, f)
-
-def saveState(game: dict):
-    saveDict(game['today_file_path'], game['words_tested'])
-    removeWordFromFile(file_path=f"{dict_path}/{game['code'][:-1]}.txt", words=game['words_not_found'])
-
-def signal_handler(sig, frame, game: dict):
-    saveState(game)
-    exit(0)
 
 for language in GAME.keys():
-    if not os.path.exists(f"{days_path}/{language}"):
-        os.makedirs(f"{days_path}/{language}")
-
-    if not os.path.exists(f"{dict_path}/{language}.txt"):
-        os.makedirs(dict_path, exist_ok=True)
-        open(f"{dict_path}/{language}.txt", mode="w", encoding="utf-8").close()
-
-    GAME[language]['today_file_path'] = f"{days_path}/{language}/{today_file}"
-
-    if os.path.exists(f"{dict_path}/{language}.txt"):
-        with open(f"{dict_path}/{language}.txt", mode="r", encoding="utf-8") as f:
-            for line in f.readlines():
-                GAME[language]['words_to_test'].append(line.replace("\n", ""))
-        random.shuffle(GAME[language]['words_to_test'])
-
-    if os.path.exists(GAME[language]['today_file_path']):
-        GAME[language]['words_tested'] = loadDict(GAME[language]['today_file_path'])
-    else:
-        open(GAME[language]['today_file_path'], mode="w", encoding="utf-8").close()
+    # Each language gets its own solver, so both can be searched at once
+    GAME[language]['solver'] = Solver(language, GAME[language]['url'], GAME[language]['code'], score_cache=score_cache_path, nearby_index=nearby_index_path)
 
 class Cementix(Static):
     """The Cementix class."""
@@ -233,9 +99,9 @@ class Cementix(Static):
         """Compose the layout."""
 
         with Horizontal(classes="padding"):
-            with VerticalScroll(id="guesses-container") as guesses_container:
-                guesses_container.border_title = "Guesses"
-                yield Markdown(id=self.prefix("guesses-list"))
+            with Vertical(id="guesses-container") as guesses_container:
+                guesses_container.border_title = f"🏆 {GAME[self.language]['title']} Rankings 🏆"
+                yield DataTable(id=self.prefix("guesses-list"), cursor_type="none", zebra_stripes=True)
 
             with Vertical():
                 yield Label("Yesterday's word was...", id=self.prefix("yesterday-word"))
@@ -252,11 +118,26 @@ class Cementix(Static):
 
     def on_mount(self) -> None:
         """A coroutine to handle the mount event."""
-        markdown = f"# 🏆 {GAME[self.language]['title']} Rankings 🏆\n"
-        markdown += markdown_leaderboard_header
-        GAME[self.language]['markdown'] = markdown
-        self.query_one(f"#{self.prefix('guesses-list')}", Markdown).update(markdown)
-        self.query_one(f"#{self.prefix('progress-bar')}", ProgressBar).update(progress=100)
+        table = self.query_one(f"#{self.prefix('guesses-list')}", DataTable)
+        table.add_column("Pos", key="position", width=4)
+        table.add_column("Word", key="word", width=18)
+        table.add_column("Score", key="score", width=10)
+        self.show_rankings()
+
+    def show_rankings(self) -> None:
+        """Rewrite only the rows that moved in the rankings, and show the best score on the progress bar."""
+        leaderboard = GAME[self.language]['solver'].leaderboard
+        table = self.query_one(f"#{self.prefix('guesses-list')}", DataTable)
+        # Rows are keyed by position, so an insertion rewrites the rows below it and nothing else
+        for position, word, score in leaderboard.changes():
+            if position <= table.row_count:
+                table.update_cell(str(position), "word", word)
+                table.update_cell(str(position), "score", score)
+            else:
+                table.add_row(f"{position}.", word, score, key=str(position))
+        while table.row_count > len(leaderboard):
+            table.remove_row(str(table.row_count))
+        self.query_one(f"#{self.prefix('progress-bar')}", ProgressBar).update(progress=leaderboard.best()[1] / MAX_SCORE * 100)
 
 class CementixApp(App):
     """The main application class."""
@@ -265,6 +146,7 @@ class CementixApp(App):
     BINDINGS = [
         Binding(key="ctrl+o", action="open_website", description="Open the website"),
         Binding(key="ctrl+s", action="save", description="save the state for all languages"),
+        Binding(key="ctrl+t", action="toggle_stats", description="Show the stats"),
     ]
 
     selected_language = 'en'
@@ -288,11 +170,16 @@ class CementixApp(App):
                 yield Label("Status:")
                 yield self.start_button
                 yield self.stop_button
+                yield Select([(mode_names[mode], mode) for mode in MODES], value=GAME[self.selected_language]['solver'].mode, allow_blank=False, id="mode")
 
         with ContentSwitcher(initial=f"{self.selected_language}-tab", id="content-switcher"):
             for language in GAME.keys():
                 yield Cementix(id=f"{language}-tab", language=language)
 
+        stats = Static(id="stats")
+        stats.display = False
+        yield stats
+
         yield Footer()
 
     def action_open_website(self):
@@ -302,7 +189,43 @@ class CementixApp(App):
     def action_save(self):
         """save the state for all languages."""
         for language in GAME.keys():
-            saveState(GAME[language])
+            GAME[language]['solver'].save()
+        lexical_cache.save(lexical_cache_path)
+
+    def action_toggle_stats(self):
+        """Show or hide the stats, measuring from the first time they are shown."""
+        stats = self.query_one("#stats", Static)
+        stats.display = not stats.display
+        metrics.enabled = True
+        if stats.display:
+            self.update_stats()
+            self.stats_timer.resume()
+        else:
+            self.stats_timer.pause()
+
+    def update_stats(self) -> None:
+        """Show throughput, latencies and queue sizes per language."""
+        metrics.snapshot()
+        lines = []
+        for language in GAME.keys():
+            gauge = lambda name: metrics.gauges.get(metrics.key(name, {'language': language}), 0)
+            ms = lambda name, q: metrics.quantile(name, q, language=language) * 1000
+            lines.append(
+                f"{GAME[language]['flag']} {metrics.rate('guesses', language=language):.1f} guesses/s"
+                f" | limit {gauge('request_rate_limit'):.1f}/s"
+                f" | request p50 {ms('request_seconds', 0.5):.0f} ms p99 {ms('request_seconds', 0.99):.0f} ms"
+                f" | expand p50 {ms('expand_seconds', 0.5):.1f} ms p99 {ms('expand_seconds', 0.99):.1f} ms"
+                f" | queue {gauge('queue_size')}"
+                f" | score cache {gauge('score_cache_hit_rate') * 100:.0f}%"
+            )
+        lines.append(f"lexical cache {lexical_cache.hit_rate * 100:.0f}% | render p99 {metrics.quantile('render_seconds', 0.99) * 1000:.1f} ms | save p99 {max(metrics.quantile('save_seconds', 0.99, language=language) for language in GAME) * 1000:.1f} ms")
+        self.query_one("#stats", Static).update("\n".join(lines))
+
+    def show_status(self) -> None:
+        """Show the start or stop button of the selected language."""
+        running = GAME[self.selected_language]['solver'].running
+        self.query_one("#start", Button).display = "none" if running else "block"
+        self.query_one("#stop", Button).display = "block" if running else "none"
 
     def on_button_pressed(self, event: Button.Pressed) -> None:
         """A coroutine to handle a button pressed event."""
@@ -312,21 +235,17 @@ class CementixApp(App):
             content_switcher.current = event.button.id
             if event.button.id is not None:
                 self.selected_language = event.button.id.split("-")[0]
-                self.query_one("#start", Button).display = "block" if GAME[self.selected_language]['status'] == Status.stopped else "none"
-                self.query_one("#stop", Button).display = "block" if GAME[self.selected_language]['status'] == Status.started else "none"
+                self.show_status()
+                self.query_one("#mode", Select).value = GAME[self.selected_language]['solver'].mode
             return
 
-        if event.button.id == "start" and max(GAME[self.selected_language]['words_tested'].values()) < MAX_SCORE if GAME[self.selected_language]['words_tested'] else True:
-            GAME[self.selected_language]['status'] = Status.started
-            self.query_one("#start", Button).display = "none"
-            self.query_one("#stop", Button).display = "block"
-            GAME[self.selected_language]['worker'] = self.run_worker(self.run_search(self.selected_language), self.selected_language, group=self.prefix("search"), thread=True)
+        solver = GAME[self.selected_language]['solver']
+        if event.button.id == "start" and not solver.running and not solver.solved:
+            # Each language searches in its own worker, so both can run at once
+            self.run_worker(solver.run(), self.selected_language, group=self.prefix("search"))
         elif event.button.id == "stop":
-            GAME[self.selected_language]['status'] = Status.stopped
-            self.query_one("#start", Button).display = "block"
-            self.query_one("#stop", Button).display = "none"
-            GAME[self.selected_language]['worker'].cancel()
-            saveState(GAME[self.selected_language])
+            # The search drains the requests in flight, then saves
+            solver.stop()
         elif event.button.id == self.prefix("submit-word"):
             input = self.query_one(f"#{self.prefix('word-input')}", Input)
             self.submit_word(input.value, self.selected_language)
@@ -340,9 +259,39 @@ class CementixApp(App):
 
     async def on_mount(self) -> None:
         """A coroutine to handle the mount event."""
+        lexical_cache.load(lexical_cache_path)
+        if metrics_path:
+            metrics.export(metrics_path)
         for language in GAME.keys():
+            GAME[language]['solver'].subscribe(self.on_solver_event)
             self.get_yesterdays_word(language)
-            self.set_interval(1, self.update_results_shown)
+        # Only the stats need polling, for their rates to decay, and only while shown
+        self.stats_timer = self.set_interval(1, self.update_stats, pause=True)
+
+    def on_solver_event(self, event) -> None:
+        """Reflect what a solver reports, whichever language it searches."""
+        if event.kind == 'result':
+            if GAME[event.language]['solver'].leaderboard.dirty:
+                with metrics.timer('render_seconds'):
+                    self.query_one(f"Cementix#{event.language}-tab", Cementix).show_rankings()
+        elif event.kind in ('started', 'stopped') and event.language == self.selected_language:
+            self.show_status()
+        elif event.kind == 'solved':
+            solver = GAME[event.language]['solver']
+            self.notify(
+                f"You have found the best word! in {len(solver.words_tested)} tries",
+                title=f"🏆 {GAME[event.language]['title']} Results 🏆",
+                severity='information'
+            )
+        elif event.kind == 'notice':
+            self.notify(event.message, severity="warning")
+            if event.language == self.selected_language:
+                self.query_one("#mode", Select).value = GAME[event.language]['solver'].mode
+
+    def on_select_changed(self, event: Select.Changed) -> None:
+        """Switch the search mode of the selected language."""
+        if event.select.id == "mode":
+            GAME[self.selected_language]['solver'].mode = event.value
 
     async def on_input_submitted(self, message: Input.Submitted) -> None:
         """A coroutine to handle a text submitted message."""
@@ -350,85 +299,39 @@ class CementixApp(App):
         self.submit_word(input.value, self.selected_language)
         input.value = ""
 
-    async def run_search(self, language: str) -> None:
-        """A coroutine to run the search."""
-
-        while (get_current_worker().is_running and (len(GAME[self.selected_language]['words_to_test']) > 0 and max(GAME[self.selected_language]['words_tested'].values()) < MAX_SCORE if GAME[self.selected_language]['words_tested'] else True)):
-            word = GAME[self.selected_language]['words_to_test'].pop()
-            self.submit_word(word, self.selected_language)
-            time.sleep(random.randint(100, 500) / SECOND)
-
-        if max(GAME[self.selected_language]['words_tested'].values()) >= MAX_SCORE if GAME[self.selected_language]['words_tested'] else True:
-            self.notify(
-                f"You have found the best word! in {len(GAME[self.selected_language]['words_tested'])} tries",
-                title=f"🏆 {GAME[self.selected_language]['title']} Results 🏆",
-                severity='information'
-            )
-            GAME[self.selected_language]['status'] = Status.stopped
-            self.query_one("#start", Button).display = "block"
-            self.query_one("#stop", Button).display = "none"
-            saveState(GAME[self.selected_language])
+    async def on_unmount(self) -> None:
+        """Close the solvers and keep the lexical fields for next time."""
+        lexical_cache.save(lexical_cache_path)
+        for language in GAME.keys():
+            await GAME[language]['solver'].aclose()
+        metrics.close()
 
-    @work(exclusive=True)
+    @work(group="submit")
     async def submit_word(self, word: str, language) -> None:
-        """gets score of the word."""
-        url = GAME[self.selected_language]['url']
-        headers = {"Origin": url, "Referer": url}
-
-        async with httpx.AsyncClient() as client:
-            response = await client.post(f"{url}/score", headers=headers, data={"word": word})
-            data = response.json() if response.content else {}
-
-            if 'p' in data:
-                GAME[language]['last_result'] = {word: data['p']}
-                GAME[language]['words_tested'][word] = float(data['p'])
-
-                for w in get_lexical_field(word, GAME[language]['code']):
-                    if w in GAME[language]['words_tested']:
-                        continue
-                    if w in GAME[language]['words_to_test']:
-                        GAME[language]['words_to_test'].remove(w)
-                    GAME[language]['words_to_test'].append(w)
-
-            elif 'e' in data:
-                GAME[language]['words_not_found'].append(word)
-            else:
-                GAME[language]['words_tested'][word] = 0.0
-
-    @work(thread=True)
+        """gets score of the word, or queues it first if the search runs."""
+        word = word.strip()
+        if not word:
+            return
+        solver = GAME[language]['solver']
+        try:
+            if not await solver.submit(word):
+                score = solver.words_tested.get(word)
+                self.notify(f"{word}: " + (f"already tested, {score}" if score is not None else "already submitted"), title="submit_word")
+        except Exception as e:
+            self.notify(f"{word}: {e}", title="submit_word", severity="error")
+
+    @work()
     async def get_yesterdays_word(self, language: str) -> None:
-        """gets yesterday's word."""
-
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{GAME[language]['url']}")
-            html = BeautifulSoup(response.content.decode("utf-8"), "html.parser")
-
-            yesterday_word = html.select('#yesterday')[0].text if html.select('#yesterday') else 'N/A'
-            self.query_one(f"#{language}-yesterday-word", Label).update(f"Yesterday's word was {yesterday_word}")
-            self.get_yesterdays_list(yesterday_word, language)
-
-    @work(thread=True)
-    async def get_yesterdays_list(self, word: str, language: str) -> None:
-        """gets the list of yesterday's word."""
-        url = GAME[language]['url']
-        headers = {"Origin": url, "Referer": url}
-
-        async with httpx.AsyncClient() as client:
-            response = await client.post(f"{url}/nearby", headers=headers, data={"word": word})
-            data = response.json() if response.content else {}
-            for w, _, _ in reversed(list(data)):
-                if w in GAME[language]['words_tested']:
-                    continue
-                if w in GAME[language]['words_to_test']:
-                    GAME[language]['words_to_test'].remove(w)
-                GAME[language]['words_to_test'].append(w)
-
-    @work(exclusive=True)
-    async def update_results_shown(self) -> None:
-        """Update the results shown."""
-        markdown = GAME[self.selected_language]['markdown']
-        markdown += f"{getRankings(GAME[self.selected_language]['words_tested'], ranking_size=50)}"
-        self.query_one(f"#{self.prefix('guesses-list')}", Markdown).update(markdown)
+        """gets yesterday's word and queues its neighbours."""
+        solver = GAME[language]['solver']
+        try:
+            yesterday_word = await solver.yesterdays_word()
+            self.query_one(f"#{language}-yesterday-word", Label).update(f"Yesterday's word was {yesterday_word or 'N/A'}")
+            if yesterday_word:
+                await solver.queue_nearby(yesterday_word)
+        except (httpx.HTTPError, ValueError):
+            # The search starts from the dictionary instead
+            pass
 
 if __name__ == "__main__":
     CementixApp().run()
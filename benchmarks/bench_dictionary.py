@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+
+"""Cold start and resident memory of loading a language's dictionary.
+
+Compares reading the whole `.txt` into a shuffled list of strings, as the
+bots used to at import time, with opening the memory-mapped `Dictionary` and
+drawing the first seeds from a sample. Each case runs in a fresh process so
+resident memory is not shared between them; it is read from /proc (Linux).
+
+    python benchmarks/bench_dictionary.py
+"""
+
+import os
+import subprocess
+import sys
+
+root = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.insert(0, root)
+
+SEEDS = 1000
+
+CASES = {
+    'list': """
+import random
+with open(path, mode="r", encoding="utf-8") as f:
+    words = [line.replace("\\n", "") for line in f.readlines()]
+random.shuffle(words)
+seeds = [words.pop() for _ in range(min(SEEDS, len(words)))]
+""",
+    'mmap': """
+from dictionary import Dictionary
+sample = Dictionary(path).sample()
+seeds = [word for _, word in zip(range(SEEDS), sample)]
+""",
+}
+
+RUNNER = """
+import os, sys, time, tracemalloc
+sys.path.insert(0, {root!r})
+path, SEEDS = {path!r}, {seeds}
+
+def resident():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+before = resident()
+tracemalloc.start()
+start = time.perf_counter()
+{case}
+elapsed = time.perf_counter() - start
+print(elapsed, resident() - before, tracemalloc.get_traced_memory()[0])
+"""
+
+
+def run(case, path):
+    code = RUNNER.format(root=root, path=path, seeds=SEEDS, case=CASES[case])
+    elapsed, rss, heap = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout.split()
+    return float(elapsed), int(rss), int(heap)
+
+
+if __name__ == '__main__':
+    from dictionary import Dictionary
+
+    print(f"{'language':>8} | {'case':>4} | {'cold start (ms)':>15} | {'resident (MB)':>13} | {'python heap (MB)':>16}")
+    for language in ('en', 'fr'):
+        path = f"{root}/Dicts/{language}.txt"
+        # Build the binary form up front, it is a one-off
+        Dictionary(path)
+        for case in CASES:
+            elapsed, rss, heap = run(case, path)
+            print(f"{language:>8} | {case:>4} | {elapsed * 1e3:>15.1f} | {rss / 1e6:>13.1f} | {heap / 1e6:>16.1f}")
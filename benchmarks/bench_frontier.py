@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+
+"""Per-guess cost of the candidate queue as the dictionary grows.
+
+Each simulated guess pops one word and pushes a lexical field of 50 words,
+half of which are already queued, like a `/score` response would.
+
+    python benchmarks/bench_frontier.py
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from frontier import Frontier
+
+SIZES = [1_000, 10_000, 100_000, 265_000]
+GUESSES = 200
+FIELD_SIZE = 50
+
+
+def make_words(size):
+    return [f"word{i}" for i in range(size)]
+
+
+def make_fields(words):
+    rng = random.Random(0)
+    return [rng.sample(words, FIELD_SIZE // 2) + [f"new{g}-{i}" for i in range(FIELD_SIZE // 2)] for g in range(GUESSES)]
+
+
+def bench_list(words, fields):
+    words_to_test = list(words)
+    start = time.perf_counter()
+    for field in fields:
+        words_to_test.pop()
+        for w in field:
+            if w in words_to_test:
+                words_to_test.remove(w)
+            words_to_test.append(w)
+    return (time.perf_counter() - start) / len(fields)
+
+
+def bench_frontier(words, fields):
+    words_to_test = Frontier(words)
+    start = time.perf_counter()
+    for field in fields:
+        words_to_test.pop()
+        for w in field:
+            words_to_test.push(w)
+    return (time.perf_counter() - start) / len(fields)
+
+
+if __name__ == '__main__':
+    print(f"{'size':>8} | {'list (µs/guess)':>16} | {'frontier (µs/guess)':>20}")
+    for size in SIZES:
+        words = make_words(size)
+        fields = make_fields(words)
+        list_cost = bench_list(words, fields) if '--skip-list' not in sys.argv else float('nan')
+        frontier_cost = bench_frontier(words, fields)
+        print(f"{size:>8} | {list_cost * 1e6:>16.1f} | {frontier_cost * 1e6:>20.1f}")
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+
+"""Tries until the first score above 500‰, seeding with shuffled or frequency-ranked words.
+
+Runs the solver against `local_server.py` for targets drawn among the most
+frequent words of the ranked dictionary, as the real puzzles are common
+words, once seeding from a shuffled dictionary and once most frequent word
+first. Needs `Dicts/<lang>.freq` from `build_dictionary.py`; with
+`--vectors`, scores come from the vectors of `build_vectors.py` rather than
+from trigrams. Everything is written to a scratch directory.
+
+    python benchmarks/bench_seeds.py -l en -n 20 --vectors
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+
+root = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.insert(0, root)
+
+from dictionary import Dictionary, DictionarySample, frequency_path
+from engine import Solver
+from local_server import Game, VectorGame, serve
+
+THRESHOLD = 500.0
+MAX_TRIES = 2000
+PORT = 8765
+
+
+async def tries_to_threshold(language, url, seeds, mode):
+    """Guesses the solver needs before a word scores above THRESHOLD, capped at MAX_TRIES."""
+    solver = Solver(language, url, {'en': 'eng', 'fr': 'fra'}[language], mode=mode)
+    solver.dictionary = Dictionary(solver.dict_file)
+    solver.words_to_test.add_seeds(seeds(solver.dictionary))
+    solver.seeded = True
+
+    def on_event(event):
+        if event.kind == 'result' and (solver.leaderboard.best()[1] >= THRESHOLD or len(solver.words_tested) >= MAX_TRIES):
+            solver.stop()
+
+    solver.subscribe(on_event)
+    solver.pipeline.limiter.rate = 0
+    await solver.run()
+    tries = len(solver.words_tested)
+    await solver.aclose()
+    return tries
+
+
+def main(args):
+    dictionary_file = f"{root}/Dicts/{args.language}.txt"
+    if not os.path.exists(frequency_path(dictionary_file)):
+        raise SystemExit(f"No {frequency_path(dictionary_file)}, run build_dictionary.py first")
+
+    rng = random.Random(args.seed)
+    ranked = Dictionary(dictionary_file)
+    targets = [ranked[i] for i in rng.sample(range(min(args.top, len(ranked))), args.targets)]
+    orders = {
+        'shuffled': lambda dictionary: DictionarySample(dictionary, rng=rng, shuffle=True),
+        'ranked': lambda dictionary: dictionary.sample(),
+    }
+
+    workdir = tempfile.mkdtemp()
+    os.makedirs(f"{workdir}/Dicts")
+    for name in os.listdir(f"{root}/Dicts"):
+        if name.startswith(args.language + ".") and not name.endswith((".bin", ".removed.txt")):
+            shutil.copy(f"{root}/Dicts/{name}", f"{workdir}/Dicts/{name}")
+    os.chdir(workdir)
+
+    results = {order: [] for order in orders}
+    try:
+        for target in targets:
+            if args.vectors:
+                game = VectorGame(args.language, target)
+            else:
+                game = Game(args.language, list(ranked), target)
+            server = serve(game, port=PORT)
+            for order, seeds in orders.items():
+                shutil.rmtree(f"{workdir}/Days", ignore_errors=True)
+                results[order].append(asyncio.run(tries_to_threshold(args.language, f"http://127.0.0.1:{PORT}", seeds, args.mode)))
+            server.shutdown()
+            server.server_close()
+            print(f"{target:<20} " + " ".join(f"{order}={results[order][-1]:<6}" for order in orders))
+    finally:
+        os.chdir(root)
+        shutil.rmtree(workdir)
+
+    print(f"\nTries to a first score above {THRESHOLD:.0f}‰ over {len(targets)} targets (capped at {MAX_TRIES}):")
+    for order, tries in results.items():
+        print(f"  {order:<10} mean {statistics.mean(tries):7.1f}  median {statistics.median(tries):7.1f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Tries to a first hot word, shuffled versus frequency-ranked seeds')
+    parser.add_argument('-l', '--language', help='Language', type=str, default='en')
+    parser.add_argument('-n', '--targets', help='Number of targets', type=int, default=10)
+    parser.add_argument('--top', help='Targets are drawn among this many most frequent words', type=int, default=5000)
+    parser.add_argument('-m', '--mode', help='Search mode', type=str, default='lifo')
+    parser.add_argument('--vectors', help='Score with word vectors rather than trigrams', action='store_true')
+    parser.add_argument('--seed', help='Random seed', type=int, default=0)
+    main(parser.parse_args())
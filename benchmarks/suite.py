@@ -0,0 +1,313 @@
+#!/usr/bin/env python
+
+"""Time and peak memory of the hot helpers, from 1k words to the whole English dictionary.
+
+Every case runs on fixtures built from the first words of `Dicts/en.txt`,
+in a scratch directory, with fixed random seeds. Time is the best of
+`--repeat` rounds; peak memory is the Python heap traced over one more run
+(memory-mapped files are not counted). `--save` writes the results as the
+baseline, `--compare` checks them against it and exits with status 1 when a
+case got slower or bigger than the tolerances allow:
+
+    python benchmarks/suite.py --compare
+    python benchmarks/suite.py --save
+    python benchmarks/suite.py -c frontier rankings -s 1k 10k
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+root = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.insert(0, root)
+
+import lexicon
+from cemantix_bot import showRankings
+from dictionary import Dictionary
+from frontier import Frontier
+from journal import replay, write_snapshot
+from leaderboard import Leaderboard
+from tombstones import Tombstones
+
+baseline_path = f"{root}/benchmarks/baseline.json"
+
+SIZES = ('1k', '10k', '100k', 'full')
+REPEAT = 5
+# Seconds a round of measurements lasts at least, and most runs in a round
+MIN_ROUND = 0.1
+MAX_RUNS = 1000
+
+# Lexical fields looked up, and words per field in the fixture index
+LOOKUPS = 1000
+FIELD_SIZE = 10
+# Share of the dictionary the website does not know
+BURIED = 0.01
+SEEDS = 1000
+
+# A case regresses past these ratios to the baseline, and past these absolute floors.
+# Timings vary by some 30% between runs on a busy machine, peak memory does not
+TIME_TOLERANCE = 0.5
+MEMORY_TOLERANCE = 0.10
+# Cases timed noisier than the others: SQLite lookups swing with the page cache, 0.6x to 1.5x on unchanged code
+TIME_TOLERANCES = {
+    'lexical_field': 1.0,
+}
+TIME_FLOOR = 0.0005
+MEMORY_FLOOR = 64 * 1024
+
+
+def fixture_words(size):
+    with open(f"{root}/Dicts/en.txt", mode="r", encoding="utf-8") as f:
+        words = [word for word in dict.fromkeys(f.read().splitlines()) if word]
+    return words if size == 'full' else words[:int(size[:-1]) * 1000]
+
+
+def write_words(path, words):
+    with open(path, mode="w", encoding="utf-8") as f:
+        f.write("".join(word + "\n" for word in words))
+
+
+# Each case takes the fixture words and a scratch directory and returns
+# `setup`, run before every measurement, and `run`, the measured part
+
+def lexical_field(words, workdir):
+    """`get_lexical_field` from the SQLite index, the cache cold."""
+    rng = random.Random(0)
+    lexicon.dict_path = workdir
+    lexicon.indexes.clear()
+    connection = sqlite3.connect(lexicon.index_path('eng'))
+    connection.execute("CREATE TABLE lexical_fields (word TEXT PRIMARY KEY, field TEXT NOT NULL) WITHOUT ROWID")
+    connection.executemany("INSERT INTO lexical_fields VALUES (?, ?)", (
+        (word, lexicon.encode_relations({w: (rng.choice(lexicon.RELATIONS), rng.randint(1, 2)) for w in rng.sample(words, min(FIELD_SIZE, len(words)))}))
+        for word in sorted(words)))
+    connection.commit()
+    connection.close()
+    queries = rng.sample(words, min(LOOKUPS, len(words)))
+
+    def setup():
+        lexicon.cache = lexicon.LexicalCache()
+
+    def run():
+        for word in queries:
+            lexicon.get_lexical_field(word, 'eng')
+
+    return setup, run
+
+
+def rankings(words, workdir):
+    """Every word scored into a `Leaderboard`, then `showRankings`."""
+    rng = random.Random(0)
+    scores = [(word, round(rng.uniform(0, 1000), 2)) for word in words]
+
+    def run():
+        leaderboard = Leaderboard(size=50)
+        for word, score in scores:
+            leaderboard.update(word, score)
+        with contextlib.redirect_stdout(io.StringIO()):
+            showRankings(leaderboard)
+
+    return None, run
+
+
+def tombstones(words, workdir):
+    """Burying 1% of the dictionary then compacting it, what `removeWordFromFile` did."""
+    rng = random.Random(0)
+    path = f"{workdir}/tombstones.txt"
+    buried = rng.sample(words, max(1, int(len(words) * BURIED)))
+
+    def setup():
+        write_words(path, words)
+        if os.path.exists(os.path.splitext(path)[0] + ".removed.txt"):
+            os.remove(os.path.splitext(path)[0] + ".removed.txt")
+
+    def run():
+        words_not_found = Tombstones(path, threshold=float('inf'))
+        for word in buried:
+            words_not_found.add(word)
+        words_not_found.save()
+        words_not_found.compact()
+
+    return setup, run
+
+
+def day_file(words, workdir):
+    """Saving then loading a day of scores, what `saveDict` / `loadDict` did."""
+    rng = random.Random(0)
+    path = f"{workdir}/day.txt"
+    scores = {word: round(rng.uniform(0, 1000), 2) for word in words}
+
+    def run():
+        write_snapshot(path, scores)
+        replay(path)
+
+    return None, run
+
+
+def dictionary_build(words, workdir):
+    """Building the memory-mapped dictionary from its text file."""
+    path = f"{workdir}/build.txt"
+    write_words(path, words)
+
+    def setup():
+        for name in os.listdir(workdir):
+            if name.startswith("build.") and name != "build.txt":
+                os.remove(f"{workdir}/{name}")
+
+    def run():
+        Dictionary(path)
+
+    return setup, run
+
+
+def dictionary_open(words, workdir):
+    """Opening a built dictionary and drawing the first seeds, the bots' start-up."""
+    path = f"{workdir}/open.txt"
+    write_words(path, words)
+    Dictionary(path)
+
+    def run():
+        sample = Dictionary(path).sample(rng=random.Random(0))
+        for _, word in zip(range(SEEDS), sample):
+            pass
+
+    return None, run
+
+
+def frontier(words, workdir):
+    """Pushing every word into a `Frontier` with random priorities, then popping them all."""
+    rng = random.Random(0)
+    priorities = [rng.random() for _ in words]
+
+    def run():
+        words_to_test = Frontier()
+        for word, priority in zip(words, priorities):
+            words_to_test.push(word, priority)
+        while words_to_test:
+            words_to_test.pop()
+
+    return None, run
+
+
+CASES = {
+    'lexical_field': lexical_field,
+    'rankings': rankings,
+    'tombstones': tombstones,
+    'day_file': day_file,
+    'dictionary_build': dictionary_build,
+    'dictionary_open': dictionary_open,
+    'frontier': frontier,
+}
+
+
+def measure(setup, run, repeat):
+    """Best time per run over `repeat` rounds and peak traced memory of one more run, in seconds and bytes.
+
+    Fast cases run several times per round, so every round lasts at least
+    `MIN_ROUND` and timer resolution and scheduling noise average out.
+    """
+    best = float('inf')
+    runs = 1
+    for _ in range(repeat):
+        elapsed = 0.0
+        for _ in range(runs):
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            run()
+            elapsed += time.perf_counter() - start
+        best = min(best, elapsed / runs)
+        runs = max(runs, min(MAX_RUNS, int(MIN_ROUND / max(best, 1e-9)) + 1))
+
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def run_suite(cases, sizes, repeat):
+    results = {}
+    workdir = tempfile.mkdtemp()
+    try:
+        for size in sizes:
+            words = fixture_words(size)
+            for case in cases:
+                casedir = f"{workdir}/{case}-{size}"
+                os.makedirs(casedir)
+                seconds, peak = measure(*CASES[case](words, casedir), repeat)
+                results[f"{case}/{size}"] = {'words': len(words), 'seconds': seconds, 'peak_bytes': peak}
+                print(f"{case:<18} {size:>5} {len(words):>8} words {seconds * 1e3:>10.2f} ms {peak / 1e6:>9.2f} MB", flush=True)
+    finally:
+        lexicon.indexes.clear()
+        shutil.rmtree(workdir)
+    return results
+
+
+def compare(results, baseline, time_tolerance=None, memory_tolerance=MEMORY_TOLERANCE):
+    """Cases slower or bigger than the baseline beyond the tolerances, as printable lines.
+
+    Without a `time_tolerance`, each case gets its own from `TIME_TOLERANCES`,
+    `TIME_TOLERANCE` by default.
+    """
+    regressions = []
+    print(f"\n{'case':<24} {'time':>8} {'memory':>8}   (ratio to the baseline)")
+    for key, result in results.items():
+        if key not in baseline['results']:
+            print(f"{key:<24} {'new':>8}")
+            continue
+        base = baseline['results'][key]
+        time_ratio = result['seconds'] / base['seconds'] if base['seconds'] else 1.0
+        memory_ratio = result['peak_bytes'] / base['peak_bytes'] if base['peak_bytes'] else 1.0
+        tolerance = time_tolerance if time_tolerance is not None else TIME_TOLERANCES.get(key.split('/')[0], TIME_TOLERANCE)
+        slower = time_ratio > 1 + tolerance and result['seconds'] - base['seconds'] > TIME_FLOOR
+        bigger = memory_ratio > 1 + memory_tolerance and result['peak_bytes'] - base['peak_bytes'] > MEMORY_FLOOR
+        flags = " ".join(flag for flag, hit in (("SLOWER", slower), ("BIGGER", bigger)) if hit)
+        print(f"{key:<24} {time_ratio:>7.2f}x {memory_ratio:>7.2f}x   {flags}")
+        if flags:
+            regressions.append(f"{key}: {flags.lower()}")
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Time and peak memory of the hot helpers, against a checked-in baseline')
+    parser.add_argument('-c', '--cases', help='Cases to run', type=str, nargs='+', choices=CASES.keys(), default=list(CASES))
+    parser.add_argument('-s', '--sizes', help='Dictionary sizes', type=str, nargs='+', choices=SIZES, default=list(SIZES))
+    parser.add_argument('-r', '--repeat', help='Runs timed per case, the best counts', type=int, default=REPEAT)
+    parser.add_argument('--baseline', help='Baseline file', type=str, default=baseline_path)
+    parser.add_argument('--save', help='Save the results as the baseline', action='store_true')
+    parser.add_argument('--compare', help='Flag regressions against the baseline', action='store_true')
+    parser.add_argument('--time-tolerance', help=f'Slowdown ratio tolerated by every case (default is {TIME_TOLERANCE}, more for the noisy cases)', type=float)
+    parser.add_argument('--memory-tolerance', help='Memory growth ratio tolerated', type=float, default=MEMORY_TOLERANCE)
+    args = parser.parse_args()
+
+    results = run_suite(args.cases, args.sizes, args.repeat)
+
+    if args.compare:
+        with open(args.baseline, mode="r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.time_tolerance, args.memory_tolerance)
+        if regressions:
+            print("\nRegressions:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+        print("\nNo regression")
+
+    if args.save:
+        baseline = {'python': platform.python_version(), 'machine': platform.platform(), 'results': results}
+        # Cases and sizes not run keep their previous baseline
+        if os.path.exists(args.baseline):
+            with open(args.baseline, mode="r", encoding="utf-8") as f:
+                baseline['results'] = {**json.load(f)['results'], **results}
+        with open(args.baseline, mode="w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+
+"""Normalize, deduplicate and rank the dictionary of a language by corpus frequency.
+
+Rewrites `Dicts/<lang>.txt` most frequent word first, without duplicates,
+multi-word entries or entries with digits, and writes the frequencies next
+to it in `Dicts/<lang>.freq`, so the bots seed their search with common words
+before rare ones. Frequencies are counted from the NLTK corpora available
+offline, frequency lists (`word count` per line) and plain-text corpora:
+
+    python -m nltk.downloader brown reuters gutenberg webtext europarl_raw
+    python build_dictionary.py -l en fr
+    python build_dictionary.py -l fr -f fr_50k.txt -c livres/*.txt
+"""
+
+import argparse
+import os
+import re
+import unicodedata
+from collections import Counter
+
+from dictionary import frequency_path
+
+dict_path = 'Dicts'
+
+# Corpora counted by default, when downloaded
+NLTK_CORPORA = {
+    'en': ('brown', 'reuters', 'gutenberg', 'webtext'),
+    'fr': ('europarl_raw.french',),
+}
+
+TOKEN = re.compile(r"\w+(?:[-'’]\w+)*")
+
+
+def normalize(word):
+    """A dictionary entry as the website expects it, or None if it can never be a guess."""
+    word = unicodedata.normalize('NFC', word.strip())
+    if not word or any(c.isspace() or c.isdigit() for c in word):
+        return None
+    return word
+
+
+def nltk_tokens(name):
+    """Words of an NLTK corpus such as `brown` or `europarl_raw.french`, or None if it is not downloaded."""
+    try:
+        import nltk.corpus
+    except ImportError:
+        raise ImportError("Please install nltk with 'pip install nltk' ")
+
+    corpus = nltk.corpus
+    try:
+        for part in name.split('.'):
+            corpus = getattr(corpus, part)
+        return corpus.words()
+    except (LookupError, AttributeError):
+        return None
+
+
+def count_frequency_list(counts, path):
+    with open(path, mode="r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[-1].isdigit():
+                counts[" ".join(parts[:-1])] += int(parts[-1])
+
+
+def count_corpus(counts, path):
+    with open(path, mode="r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            counts.update(TOKEN.findall(line))
+
+
+def frequency(counts, word):
+    # Lowercase words also occur capitalized at the start of sentences
+    return counts.get(word, 0) + (counts.get(word.capitalize(), 0) if word.islower() else 0)
+
+
+def build(language, frequency_lists=(), corpora=(), nltk_corpora=None):
+    txt_path = f"{dict_path}/{language}.txt"
+    counts = Counter()
+    for name in NLTK_CORPORA.get(language, ()) if nltk_corpora is None else nltk_corpora:
+        tokens = nltk_tokens(name)
+        if tokens is None:
+            print(f"{language}: NLTK corpus {name} is not downloaded, skipped (python -m nltk.downloader {name.split('.')[0]})")
+            continue
+        counts.update(tokens)
+    for path in frequency_lists:
+        count_frequency_list(counts, path)
+    for path in corpora:
+        count_corpus(counts, path)
+    if not counts:
+        raise SystemExit(f"{language}: no frequencies to rank by, download an NLTK corpus or pass --frequencies / --corpus")
+
+    with open(txt_path, mode="r", encoding="utf-8") as f:
+        words = [word for word in dict.fromkeys(normalize(line) for line in f.read().splitlines()) if word]
+    frequencies = {word: frequency(counts, word) for word in words}
+    # Stable, so words never seen keep their order at the end
+    words.sort(key=lambda word: -frequencies[word])
+
+    with open(txt_path + ".tmp", mode="w", encoding="utf-8") as f:
+        f.write("".join(word + "\n" for word in words))
+    with open(frequency_path(txt_path) + ".tmp", mode="w", encoding="utf-8") as f:
+        f.write("".join(f"{word}\t{frequencies[word]}\n" for word in words if frequencies[word]))
+    os.replace(txt_path + ".tmp", txt_path)
+    os.replace(frequency_path(txt_path) + ".tmp", frequency_path(txt_path))
+
+    seen = sum(1 for word in words if frequencies[word])
+    print(f"{language}: {len(words)} words, {seen} seen in the corpora, most frequent: {', '.join(words[:10])}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Normalize, deduplicate and rank dictionaries by corpus frequency')
+    parser.add_argument('-l', '--languages', help='Languages', type=str, nargs='+', default=['en', 'fr'])
+    parser.add_argument('-f', '--frequencies', help='Frequency lists, one `word count` per line', type=str, nargs='*', default=[])
+    parser.add_argument('-c', '--corpus', help='Plain-text corpora', type=str, nargs='*', default=[])
+    parser.add_argument('-n', '--nltk', help='NLTK corpora to count (defaults per language, none with an empty list)', type=str, nargs='*')
+    args = parser.parse_args()
+
+    for language in args.languages:
+        build(language, args.frequencies, args.corpus, args.nltk)
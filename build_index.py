@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+
+"""Build the lexical-field index used by `lexicon.get_lexical_relations`.
+
+Walks WordNet once for every dictionary word and every WordNet lemma of a
+language and stores the result in `Dicts/<lang>.lex.sqlite`, so the bots
+never have to import NLTK:
+
+    python build_index.py -l en fr
+"""
+
+import argparse
+import os
+import sqlite3
+
+import lexicon
+
+languages = {
+    'en': 'eng',
+    'fr': 'fra',
+}
+
+BATCH_SIZE = 1000
+
+
+def index_keys(language, code):
+    """Every word the bots may ask the lexical field of."""
+    keys = set()
+    dictionary = f"{lexicon.dict_path}/{language}.txt"
+    if os.path.exists(dictionary):
+        with open(dictionary, mode="r", encoding="utf-8") as f:
+            keys.update(word for word in f.read().splitlines() if word)
+    keys.update(name.replace('_', '-') for name in lexicon.load_wordnet().all_lemma_names(lang=code))
+    return sorted(keys)
+
+
+def build(language, code):
+    path = lexicon.index_path(code)
+    tmp_path = path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    keys = index_keys(language, code)
+    connection = sqlite3.connect(tmp_path)
+    connection.execute("CREATE TABLE lexical_fields (word TEXT PRIMARY KEY, field TEXT NOT NULL) WITHOUT ROWID")
+
+    rows = []
+    for i, word in enumerate(keys, start=1):
+        try:
+            relations = lexicon.walk_wordnet(word, code, depth=lexicon.MAX_DEPTH)
+        except Exception as e:
+            lexicon.log_error(word, e)
+            relations = {}
+        # Words without a lexical field are simply absent
+        if relations:
+            rows.append((word, lexicon.encode_relations(relations)))
+        if len(rows) >= BATCH_SIZE or i == len(keys):
+            connection.executemany("INSERT INTO lexical_fields VALUES (?, ?)", rows)
+            rows = []
+            print(f"\r{language}: {i}/{len(keys)}", end="")
+
+    connection.commit()
+    connection.execute("VACUUM")
+    connection.close()
+    os.replace(tmp_path, path)
+    print(f"\r{language}: {len(keys)} words -> {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build the lexical-field index')
+    parser.add_argument('-l', '--language', help='Languages', type=str, nargs='+', choices=languages.keys(), default=list(languages.keys()))
+    args = parser.parse_args()
+
+    for language in args.language:
+        build(language, languages[language])
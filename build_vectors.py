@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+
+"""Build the word-vector matrix used by `triangulation.Triangulator`.
+
+Reads embeddings in the word2vec / fastText text format (a `count dim`
+header, then one `word v1 ... vd` line per word), keeps the words of the
+language's dictionary, optionally projects them on their first principal
+components so a re-rank stays within a few milliseconds, and writes unit
+float32 rows to `Dicts/<lang>.vec.npy` next to their words in
+`Dicts/<lang>.vec.txt`:
+
+    python build_vectors.py -l fr -i frWac_no_postag_phrase_500_cbow_cut10.txt --dim 64
+"""
+
+import argparse
+import os
+
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError("Please install numpy with 'pip install numpy' ")
+
+from triangulation import dict_path, vectors_path, vocabulary_path
+
+# Rows the principal components are fitted on
+PCA_SAMPLE = 50000
+
+
+def read_vectors(input_path, vocabulary=None):
+    words, rows, seen = [], [], set()
+    with open(input_path, mode="r", encoding="utf-8", errors="replace") as f:
+        first = f.readline().split()
+        dim = int(first[1]) if len(first) == 2 else len(first) - 1
+        if len(first) != 2:
+            f.seek(0)
+        for line in f:
+            # Multi-word entries may contain spaces, the vector is always the last `dim` fields
+            parts = line.rstrip().split(" ")
+            word = " ".join(parts[:-dim])
+            if len(parts) <= dim or (vocabulary is not None and word not in vocabulary) or word in seen:
+                continue
+            seen.add(word)
+            words.append(word)
+            rows.append(np.asarray(parts[-dim:], dtype=np.float32))
+    return words, np.vstack(rows)
+
+
+def normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def reduce(vectors, dim):
+    """Project the vectors on their `dim` first principal components."""
+    sample = vectors[np.random.default_rng(0).choice(len(vectors), min(len(vectors), PCA_SAMPLE), replace=False)]
+    mean = sample.mean(axis=0)
+    _, _, components = np.linalg.svd(sample - mean, full_matrices=False)
+    return (vectors - mean) @ components[:dim].T
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build the word-vector matrix of a language')
+    parser.add_argument('-l', '--language', help='Language', type=str, default='en')
+    parser.add_argument('-i', '--input', help='Embeddings in word2vec / fastText text format', type=str, required=True)
+    parser.add_argument('-d', '--dim', help='Keep only this many principal components', type=int)
+    parser.add_argument('--all', help='Keep words missing from the dictionary too', action='store_true')
+    args = parser.parse_args()
+
+    vocabulary = None
+    if not args.all:
+        with open(f"{dict_path}/{args.language}.txt", mode="r", encoding="utf-8") as f:
+            vocabulary = set(f.read().splitlines())
+
+    words, vectors = read_vectors(args.input, vocabulary)
+    vectors = normalize(vectors)
+    if args.dim and args.dim < vectors.shape[1]:
+        vectors = normalize(reduce(vectors, args.dim))
+
+    np.save(vectors_path(args.language), vectors.astype(np.float32))
+    with open(vocabulary_path(args.language), mode="w", encoding="utf-8") as f:
+        f.write("".join(word + "\n" for word in words))
+    print(f"{args.language}: {len(words)} words x {vectors.shape[1]} -> {vectors_path(args.language)} ({os.path.getsize(vectors_path(args.language)) / 1e6:.1f} MB)")
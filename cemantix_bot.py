@@ -1,21 +1,27 @@
 #!/usr/bin/env python
 
+import asyncio
 from functools import partial
-import json
 import os
-import random
-import signal
-import time
 import argparse
-from datetime import datetime, timedelta
 import shutil
-from nltk.inference import resolution
-import requests
-import nltk
-from nltk.corpus import wordnet
 
-nltk.download("wordnet", quiet=True)
-nltk.download('omw-1.4', quiet=True)
+try:
+    import httpx
+except ImportError:
+    raise ImportError("Please install httpx with 'pip install httpx' ")
+
+from coordinator import Worker
+from engine import Solver
+from journal import FSYNC_POLICIES, replay
+from lexicon import cache as lexical_cache
+from metrics import metrics
+from nearby import index_path as nearby_index_path
+from normalize import surface
+from scorecache import cache_path as score_cache_path
+from scoring import DEFAULT_CONCURRENCY, DEFAULT_RATE
+from solver import MODES
+from tombstones import Tombstones
 
 red = "\033[1;31m"
 green = "\033[1;32m"
@@ -26,7 +32,6 @@ cyan = "\033[1;36m"
 white = "\033[1;37m"
 reset = "\033[0m"
 
-second = 1000
 percent = 100
 max_score = 1000.0
 
@@ -34,29 +39,20 @@ languages = {
     'en': {
         'name': 'English',
         'code': 'eng',
-        'url': 'https://cemantle.certitudes.org',
+        'url': os.environ.get('CEMANTIX_EN_URL', 'https://cemantle.certitudes.org'),
     },
     'fr': {
         'name': 'French',
         'code': 'fra',
-        'url': 'https://cemantix.certitudes.org',
+        'url': os.environ.get('CEMANTIX_FR_URL', 'https://cemantix.certitudes.org'),
     },
 }
 
 dict_path = 'Dicts'
 days_path = "Days"
 
-today_file = f"{datetime.strftime(datetime.now(), '%d-%m-%Y')}.txt"
-yesterday_file = f"{datetime.strftime(datetime.now() - timedelta(days=1), '%d-%m-%Y')}.txt"
-
-
-for language in languages.keys():
-    if not os.path.exists(f"{days_path}/{language}"):
-        os.makedirs(f"{days_path}/{language}")
-
-    if not os.path.exists(f"{dict_path}/{language}.txt"):
-        os.makedirs(dict_path, exist_ok=True)
-        open(f"{dict_path}/{language}.txt", mode="w", encoding="utf-8").close()
+# Seconds between two /stats requests in daemon mode
+POLL_INTERVAL = 30.0
 
 
 def get_max_value(dictionary):
@@ -69,56 +65,13 @@ def get_max_value(dictionary):
     return max_key, max_value
 
 
-def removeWordFromFile(file_path, word='', words=[]):
-    with open(file_path, mode="r", encoding="utf-8") as f:
-        word_list = f.read().splitlines()
-    if not word and not words:
-        word_list = list(set(word_list))
-    with open(file_path, mode="w", encoding="utf-8") as f:
-        for w in word_list:
-            if (word and w != word) or (words and w not in words) or (not word and not words):
-                f.write(w + "\n")
-
-
-def get_lexical_field(word, lang):
-    # Collect lexical field words
-    lexical_field = set()
-
-    try:
-        # Get synsets (sense groupings)
-        for synset in wordnet.synsets(word, lang=lang):
-            if not synset:
-                continue
-
-            # Add synonyms
-            for lemma in synset.lemmas(lang=lang):
-                lexical_field.add(lemma.name())
-            # Add hypernyms (broader terms)
-            for hypernym in synset.hypernyms():
-                lexical_field.update(lemma.name() for lemma in hypernym.lemmas(lang=lang))
-            # Add hyponyms (narrower terms)
-            for hyponym in synset.hyponyms():
-                lexical_field.update(lemma.name() for lemma in hyponym.lemmas(lang=lang))
-
-        lexical_field = [lf.replace('_', '-') for lf in list(lexical_field)]
-
-    except Exception as e:
-        with open('error.log', mode='a', encoding='utf-8') as f:
-            f.write(f'{word}: {e}\n')
-
-    return lexical_field
-
-
 def showProgress(count, total, width=25, symbol='-', name=''):
     line = "\r " + green + symbol * int(count / total * width) + red + symbol * (width - int(count / total * width)) + reset + f" {(count / total) * percent:.2f}% " + white + (f"[{name}]" if name else name) + reset
     print(line.ljust(shutil.get_terminal_size().columns), end="")
 
 
-def showRankings(ranking_size=25):
-    ranking = {}
-    for word, value in words_tested.items():
-        ranking[word] = value
-    ranking = sorted(ranking.items(), key=lambda x: x[1], reverse=True)
+def showRankings(leaderboard, ranking_size=25):
+    ranking = leaderboard.rows()
 
     if len(ranking):
         result_title_length = 95
@@ -143,105 +96,185 @@ def showRankings(ranking_size=25):
 
 
 def loadDict(file_path):
-    if os.path.getsize(file_path) == 0:
-        return {}
-    with open(file_path, mode="r", encoding="utf-8") as f:
-        return json.load(f)
+    return replay(file_path)
+
+
+def signal_handler(sig, frame, solvers):
+    for solver in solvers:
+        solver.close()
+    metrics.close()
+    if args.lexical_cache:
+        lexical_cache.save(args.lexical_cache)
+    for solver in solvers:
+        if len(solvers) > 1:
+            print("\n" + white + languages[solver.language]['name'] + reset, end="")
+        showRankings(solver.leaderboard)
+    exit(0)
 
 
-def saveDict(file_path):
-    with open(file_path, mode="w", encoding="utf-8") as f:
-        json.dump(words_tested, f)
+def on_event(event, solvers):
+    if event.kind == 'notice':
+        print("\n" + yellow + event.message + reset)
+    if event.kind == 'rollover':
+        print("\n" + white + languages[event.language]['name'] + f": {event.message or 'new puzzle'}" + reset)
+    if event.kind != 'result':
+        return
+
+    # One progress line for all the languages searched at once
+    names = []
+    for solver in solvers:
+        best_word, best_value = solver.leaderboard.best()
+        last_result = solver.last_result
+        names.append((f'{solver.language}: ' if len(solvers) > 1 else '') +
+                     ('Best: ' + f'{best_word}' + ' | ' if best_word else '') +
+                     (f'Found: {list(last_result.keys())[0]} - {list(last_result.values())[0]/max_score*percent:.2f}% | ' if last_result and len(solvers) == 1 else '') +
+                     (f'Tried {event.word}' if solver.language == event.language else f'{len(solver.words_tested)} tries') +
+                     f' @ {solver.pipeline.rate:.1f}/s' +
+                     (f' | {metrics.rate("guesses", language=solver.language):.1f} guesses/s, '
+                      f'p50 {metrics.quantile("request_seconds", 0.5, language=solver.language) * 1000:.0f} ms, '
+                      f'p99 {metrics.quantile("request_seconds", 0.99, language=solver.language) * 1000:.0f} ms' if metrics.enabled else ''))
+    best_value = min(solver.leaderboard.best()[1] for solver in solvers)
+    showProgress(count=best_value, total=max_score, name=' || '.join(names), symbol='█')
+
+
+async def search(solver):
+    # Workers leave the frontier, and so its bootstrap, to the coordinator
+    if not isinstance(solver, Worker) and os.path.exists(solver.yesterday_file_path):
+        yesterday_best_word = get_max_value(loadDict(solver.yesterday_file_path))
+        if yesterday_best_word[1] == max_score:
+            try:
+                await solver.queue_nearby(yesterday_best_word[0])
+            except (httpx.HTTPError, ValueError):
+                pass
 
+    if args.test:
+        solver.push(args.test)
 
-def signal_handler(sig, frame, path, words):
-    saveDict(path)
-    removeWordFromFile(file_path=path, words=words)
-    showRankings()
-    exit(0)
+    await solver.run()
 
 
-if __name__ == '__main__':
-    session = requests.Session()
-    words_tested = {}
-    words_to_test = []
-    words_not_found = []
-    last_result = {}
+async def search_all(solvers):
+    # Every language searches on its own, at the same time
+    try:
+        await asyncio.gather(*(search(solver) for solver in solvers))
+    finally:
+        for solver in solvers:
+            await solver.pipeline.aclose()
+
+
+async def watch(solver, interval):
+    """Solve every puzzle of a language as soon as /stats shows a new puzzle number."""
+    searching = None
+    # Scores carry the puzzle number too, so the pipeline's may already be the new one
+    puzzle = None
+    while True:
+        try:
+            data = await solver.pipeline.stats()
+        except (httpx.HTTPError, ValueError):
+            data = None
+        if data is not None and searching is not None and data.get('n') != puzzle:
+            # Scores still in flight are cached under the puzzle they were asked for
+            solver.pipeline.puzzle = puzzle
+            solver.stop()
+            await asyncio.gather(searching, return_exceptions=True)
+            solver.new_day(data.get('n'))
+            searching = None
+        if data is not None and searching is not None and searching.done() and not solver.solved:
+            # Stopped by an error, or while the website was down, which it no longer is
+            error = None if searching.cancelled() else searching.exception()
+            if error is not None:
+                print("\n" + red + f"{solver.language}: {error!r}, searching again" + reset)
+            searching = None
+        if data is not None and searching is None:
+            puzzle = data.get('n')
+            searching = asyncio.ensure_future(search(solver))
+        await asyncio.sleep(interval)
+
+
+async def daemon(solvers, interval):
+    # Caches, dictionaries and HTTP clients are kept from one puzzle to the next
+    try:
+        await asyncio.gather(*(watch(solver, interval) for solver in solvers))
+    finally:
+        for solver in solvers:
+            await solver.pipeline.aclose()
 
+
+if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Cemantix bot')
     parser.add_argument('-t', '--test', help='Test a word', type=str)
-    parser.add_argument('-l', '--language', help='Language', type=str, default='en')
+    parser.add_argument('-l', '--language', help='Languages, solved in parallel', type=str, nargs='+', choices=languages.keys(), default=['en'])
+    parser.add_argument('-u', '--url', help='Base URL of the website, e.g. a local_server.py (single language only)', type=str)
+    parser.add_argument('-m', '--mode', help='Search mode', type=str, choices=MODES, default='lifo')
+    parser.add_argument('-c', '--concurrency', help='Requests in flight at once, per language', type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument('-r', '--rate', help='Ceiling of the requests per second, per language (0 for none)', type=float, default=DEFAULT_RATE)
+    parser.add_argument('-s', '--fsync', help='When journaled scores are fsynced', type=str, choices=FSYNC_POLICIES, default='batch')
+    parser.add_argument('-k', '--lexical-cache', help='File keeping lexical fields across runs', type=str)
+    parser.add_argument('--score-cache', help='SQLite file the scores are shared in across runs and processes', type=str, default=score_cache_path)
+    parser.add_argument('--no-score-cache', help='Always ask the website', dest='score_cache', action='store_const', const=None)
+    parser.add_argument('--nearby-index', help='SQLite file every /nearby list is kept in, and neighbours looked up from', type=str, default=nearby_index_path)
+    parser.add_argument('--no-nearby-index', help='Neither keep nor use past /nearby lists', dest='nearby_index', action='store_const', const=None)
+    parser.add_argument('--coordinator', help='Score words leased by a coordinator.py at this Unix socket or host:port (single language only)', type=str)
+    parser.add_argument('--metrics', help='Show throughput and latency, and export every metric to this .json or .prom file', type=str, nargs='?', const='')
+    parser.add_argument('--metrics-interval', help='Seconds between two exports of the metrics', type=float, default=5.0)
+    parser.add_argument('-d', '--daemon', help='Keep running and solve every new puzzle as soon as it is out', action='store_true')
+    parser.add_argument('--poll-interval', help='Seconds between two checks for a new puzzle in daemon mode', type=float, default=POLL_INTERVAL)
+    parser.add_argument('--compact', help='Rewrite the dictionary without the words not found, then exit', action='store_true')
     args = parser.parse_args()
 
-    website_url = languages[args.language]['url']
-    headers = {"Origin": website_url, "Referer": website_url}
-
-    today_file_path = f"{days_path}/{args.language}/{today_file}"
-    yesterday_file_path = f"{days_path}/{args.language}/{yesterday_file}"
-
-    global sigterm_handler
-    signal.signal(signal.SIGINT, partial(signal_handler, path=today_file_path, words=words_not_found))
-
-    if os.path.exists(f"{dict_path}/{args.language}.txt"):
-        with open(f"{dict_path}/{args.language}.txt", mode="r", encoding="utf-8") as f:
-            for line in f.readlines():
-                words_to_test.append(line.replace("\n", ""))
-        random.shuffle(words_to_test)
-
-    if os.path.exists(today_file_path):
-        words_tested = loadDict(today_file_path)
-    else:
-        open(today_file_path, mode="w", encoding="utf-8").close()
-
-    if os.path.exists(yesterday_file_path):
-        yesterday_best_word = get_max_value(loadDict(yesterday_file_path))
-        if yesterday_best_word[1] == max_score:
-            res = session.post(website_url + "/nearby", headers=headers, data={"word": yesterday_best_word[0]})
-            for word in reversed(list(res.json())):
-                words_to_test.append(word[0])
-
-    if args.test:
-        words_to_test.append(args.test)
+    if args.url and len(args.language) > 1:
+        parser.error("--url only applies to a single language, use CEMANTIX_EN_URL / CEMANTIX_FR_URL instead")
+    if args.coordinator and len(args.language) > 1:
+        parser.error("--coordinator only applies to a single language, start one worker per coordinator")
+    if args.coordinator and args.daemon:
+        parser.error("--daemon does not apply to workers, run the coordinator again for every puzzle")
+
+    if args.compact:
+        for language in args.language:
+            Tombstones(f"{dict_path}/{language}.txt", key=lambda word: surface(word, language)).compact()
+        exit(0)
+
+    if args.lexical_cache:
+        lexical_cache.load(args.lexical_cache)
+
+    if args.metrics:
+        metrics.export(args.metrics, interval=args.metrics_interval)
+    elif args.metrics is not None:
+        metrics.enabled = True
+
+    solvers = []
+    for language in args.language:
+        if args.coordinator:
+            solver = Worker(language, args.url or languages[language]['url'], args.coordinator,
+                            concurrency=args.concurrency, rate=args.rate, leaderboard_size=25, score_cache=args.score_cache)
+        else:
+            solver = Solver(language, args.url or languages[language]['url'], languages[language]['code'], mode=args.mode,
+                            concurrency=args.concurrency, rate=args.rate, fsync=args.fsync, leaderboard_size=25, score_cache=args.score_cache,
+                            nearby_index=args.nearby_index)
+        solver.subscribe(partial(on_event, solvers=solvers))
+        solvers.append(solver)
 
     try:
-        while len(words_to_test) > 0 and max(words_tested.values()) < max_score if words_tested else True:
-            word = words_to_test.pop()
-
-            res = session.post(website_url + "/score", headers=headers, data={"word": word})
-            data = res.json() if res.content else {}
-
-            if 'p' in data:
-                last_result = {word: data['p']}
-                words_tested[word] = float(data['p'])
-
-                for lf in get_lexical_field(word, languages[args.language]['code']):
-                    if lf in words_tested:
-                        continue
-                    if lf in words_to_test:
-                        words_to_test.remove(lf)
-                    words_to_test.append(lf)
-
-            elif 'e' in data:
-                words_not_found.append(word)
-            else:
-                words_tested[word] = 0.0
-
-            best_word, best_value = get_max_value(words_tested)
-            showProgress(count=get_max_value(words_tested)[1], total=max_score,
-                        name=('Best: ' + f'{best_word}' + ' | ' if best_word else '') +
-                            (f'Found: {list(last_result.keys())[0]} - {list(last_result.values())[0]/max_score*percent:.2f}% | ' if last_result else '') +
-                            f'Trying {word}',
-                        symbol='█')
-            time.sleep(random.randint(100, 500) / second)
+        asyncio.run(daemon(solvers, args.poll_interval) if args.daemon else search_all(solvers))
+
+    except KeyboardInterrupt:
+        signal_handler(None, None, solvers)
 
     except Exception as e:
         print("\n" + red + str(e) + reset)
-        signal_handler(None, None, today_file_path, words_not_found)
-
-    best_word, best_value = get_max_value(words_tested)
-    tries = len(words_tested)
-    showProgress(count=best_value, total=max_score,
-                 name=f'{best_word}: {(green if best_value == max_score else red) + str(best_value) + white} | in {(green if tries < (max_score * 0.1) else yellow if tries < (max_score * 0.5) else red) + str(tries) + white} tries',
-                 symbol='█')
-
-    signal_handler(None, None, today_file_path, words_not_found)
+        signal_handler(None, None, solvers)
+
+    for solver in solvers:
+        best_word, best_value = solver.leaderboard.best()
+        tries = len(solver.words_tested)
+        showProgress(count=best_value, total=max_score,
+                     name=(f'{solver.language}: ' if len(solvers) > 1 else '') +
+                          f'{best_word}: {(green if best_value == max_score else red) + str(best_value) + white} | in {(green if tries < (max_score * 0.1) else yellow if tries < (max_score * 0.5) else red) + str(tries) + white} tries',
+                     symbol='█')
+        if solver.score_cache is not None:
+            cache = solver.score_cache
+            print(f"\n{white}Score cache:{reset} {cache.hits} hits / {cache.hits + cache.misses} lookups ({cache.hit_rate * percent:.1f}%)", end="")
+        if len(solvers) > 1:
+            print()
+
+    signal_handler(None, None, solvers)
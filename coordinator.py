@@ -0,0 +1,436 @@
+#!/usr/bin/env python
+
+"""One search, any number of bots: a coordinator owning the frontier of a puzzle.
+
+The coordinator keeps the frontier, the scores, the journal and the lexical
+expansion of one language's puzzle, and leases batches of candidates to
+workers over a Unix socket or TCP. Workers, `cemantix_bot.py --coordinator`
+on this machine or others, only score the words they lease and send the
+scores back, so the request budget is spread across processes and hosts
+while every word is scored once. A lease not answered within
+`--lease-timeout`, or held by a worker that disconnects, goes back to the
+front of the frontier, and a score sent for it late is dropped. Once a word scores 1000 every worker is told and
+stops.
+
+    python coordinator.py -l fr --listen /tmp/cemantix-fr.sock
+    python cemantix_bot.py -l fr --coordinator /tmp/cemantix-fr.sock
+    python coordinator.py -l en --listen 0.0.0.0:7000
+    python cemantix_bot.py -l en --coordinator coordinator-host:7000
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import time
+from collections import deque
+
+try:
+    import httpx
+except ImportError:
+    raise ImportError("Please install httpx with 'pip install httpx' ")
+
+from engine import Event, Solver
+from leaderboard import Leaderboard
+from nearby import index_path as nearby_index_path
+from scorecache import ScoreCache
+from scoring import DEFAULT_CONCURRENCY, DEFAULT_RATE, ScoringPipeline
+from solver import MANUAL_PRIORITY, MAX_SCORE, MODES
+
+# Seconds a worker has to send back the score of a leased word
+LEASE_TIMEOUT = 30.0
+
+# Seconds between two sweeps of the expired leases
+SWEEP_INTERVAL = 1.0
+
+# Seconds the coordinator waits, once done, for workers to send their last scores
+DRAIN_TIMEOUT = 10.0
+
+languages = {
+    'en': {'code': 'eng', 'url': os.environ.get('CEMANTIX_EN_URL', 'https://cemantle.certitudes.org')},
+    'fr': {'code': 'fra', 'url': os.environ.get('CEMANTIX_FR_URL', 'https://cemantix.certitudes.org')},
+}
+
+
+def parse_address(address):
+    """`host:port` for TCP, anything else is the path of a Unix socket."""
+    host, _, port = address.rpartition(':')
+    if host and port.isdigit():
+        return host, int(port)
+    return address, None
+
+
+async def open_connection(address):
+    host, port = parse_address(address)
+    if port is None:
+        return await asyncio.open_unix_connection(host)
+    return await asyncio.open_connection(host, port)
+
+
+async def start_server(handler, address):
+    host, port = parse_address(address)
+    if port is None:
+        if os.path.exists(host):
+            os.remove(host)
+        return await asyncio.start_unix_server(handler, host)
+    return await asyncio.start_server(handler, host, port)
+
+
+def send(writer, op, **message):
+    """Write one message, a line of JSON."""
+    writer.write((json.dumps({'op': op, **message}) + "\n").encode("utf-8"))
+
+
+async def receive(reader):
+    """Read one message, or None once the other end has gone."""
+    line = await reader.readline()
+    return json.loads(line) if line else None
+
+
+class Coordinator:
+    """Leases the candidates of a solver to workers and folds their scores back in.
+
+    The solver is only used for its state: its frontier hands out the
+    leases, and `handle_result` journals the scores and expands them exactly
+    as a search of its own would. Lease requests that cannot be served yet,
+    while every candidate is out with other workers, wait for the scores
+    that will queue more.
+    """
+
+    def __init__(self, solver, lease_timeout=LEASE_TIMEOUT):
+        self.solver = solver
+        self.lease_timeout = lease_timeout
+        # Leased word -> (worker, deadline)
+        self.leases = {}
+        self.workers = {}
+        # Lease requests waiting for candidates, as (worker, count)
+        self.waiting = deque()
+        self.finished = None
+        self._ids = itertools.count(1)
+
+    async def serve(self, address):
+        """Coordinate workers connecting to `address` until the puzzle is solved or out of candidates."""
+        self.finished = asyncio.Event()
+        self.solver.prepare()
+        if self.solver.pipeline.puzzle is None:
+            try:
+                await self.solver.pipeline.stats()
+            except (httpx.HTTPError, ValueError):
+                pass
+
+        server = await start_server(self.handle, address)
+        sweeper = asyncio.ensure_future(self.sweep())
+        self.solver.emit('started')
+        try:
+            await self.finished.wait()
+            # Let the workers hand in the scores they still have in flight
+            deadline = time.monotonic() + DRAIN_TIMEOUT
+            while self.workers and time.monotonic() < deadline:
+                await asyncio.sleep(0.1)
+        finally:
+            sweeper.cancel()
+            server.close()
+            await server.wait_closed()
+            self.solver.save()
+        if self.solver.solved:
+            self.solver.emit('solved')
+        self.solver.emit('stopped')
+
+    async def handle(self, reader, writer):
+        """Talk to one worker until it disconnects."""
+        worker = None
+        try:
+            hello = await receive(reader)
+            if hello is None or hello.get('op') != 'hello':
+                return
+            puzzle = self.solver.pipeline.puzzle
+            if hello.get('language') != self.solver.language or (puzzle is not None and hello.get('puzzle') not in (None, puzzle)):
+                send(writer, 'error', message=f"This coordinator solves puzzle {puzzle} in {self.solver.language}")
+                return
+            worker = next(self._ids)
+            self.workers[worker] = writer
+            send(writer, 'welcome', worker=worker, puzzle=puzzle)
+            if self.finished.is_set():
+                self.send_done(writer)
+
+            while (message := await receive(reader)) is not None:
+                if message['op'] == 'lease':
+                    self.waiting.append((worker, message.get('n', 1)))
+                elif message['op'] == 'result':
+                    self.complete(worker, message['word'], message.get('data'))
+                elif message['op'] == 'push':
+                    self.solver.push(message['word'])
+                self.serve_waiting()
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            if worker is not None:
+                del self.workers[worker]
+                self.waiting = deque((w, n) for w, n in self.waiting if w != worker)
+                for word in [word for word, (w, _) in self.leases.items() if w == worker]:
+                    self.release(word)
+                self.serve_waiting()
+            writer.close()
+
+    def lease(self, worker, n):
+        words = []
+        while len(words) < n and (word := self.solver.next_candidate()) is not None:
+            self.leases[word] = (worker, time.monotonic() + self.lease_timeout)
+            words.append(word)
+        return words
+
+    def serve_waiting(self):
+        """Answer the waiting lease requests in order, as far as candidates go."""
+        if self.finished.is_set():
+            return
+        while self.waiting:
+            worker, n = self.waiting[0]
+            words = self.lease(worker, n)
+            if not words:
+                break
+            self.waiting.popleft()
+            send(self.workers[worker], 'lease', words=words)
+        # Nothing left to hand out and no score left to expand
+        if self.waiting and not self.leases:
+            self.finish()
+
+    def complete(self, worker, word, data):
+        """Fold in the score of a leased word, if `worker` still holds the lease.
+
+        A score sent after the lease expired is dropped, even if the word was
+        not leased again yet: it went, or goes, back to the frontier, and
+        the worker it is leased to next scores it.
+        """
+        holder, deadline = self.leases.get(word, (None, None))
+        if holder != worker:
+            return
+        if deadline < time.monotonic():
+            self.release(word)
+            return
+        del self.leases[word]
+        if word in self.solver.words_tested or word in self.solver.words_not_found:
+            return
+        self.solver.handle_result(word, data)
+        if self.solver.solved:
+            self.finish()
+
+    def release(self, word):
+        """Put a leased word back at the front of the frontier."""
+        del self.leases[word]
+        self.solver.in_flight.discard(word)
+        if word not in self.solver.words_tested:
+            # It was at the front when it was leased
+            self.solver.push(word, MANUAL_PRIORITY)
+
+    def release_expired(self):
+        now = time.monotonic()
+        for word in [word for word, (_, deadline) in self.leases.items() if deadline < now]:
+            self.release(word)
+
+    async def sweep(self):
+        while True:
+            await asyncio.sleep(SWEEP_INTERVAL)
+            self.release_expired()
+            self.serve_waiting()
+
+    def finish(self):
+        """Tell every worker the search is over."""
+        if self.finished.is_set():
+            return
+        self.finished.set()
+        for writer in self.workers.values():
+            self.send_done(writer)
+
+    def send_done(self, writer):
+        word, score = self.solver.leaderboard.best()
+        send(writer, 'done', word=word, score=score, solved=self.solver.solved)
+
+
+class Worker:
+    """Scores the words a coordinator leases to it, in place of a `Solver`.
+
+    It has the same `run` / `stop` / `push` interface and emits the same
+    events, but keeps no frontier, journal or tombstones: the coordinator
+    does. Its leaderboard only holds the words it scored itself, plus the
+    best word overall once the coordinator says the search is over.
+    """
+
+    def __init__(self, language, url, address, concurrency=DEFAULT_CONCURRENCY, rate=DEFAULT_RATE, leaderboard_size=50, score_cache=None):
+        self.language = language
+        self.url = url
+        self.address = address
+        self.concurrency = concurrency
+        self.rate = rate
+        self.running = False
+        self.stopping = False
+        self.done = False
+        self.last_result = {}
+        self.words_tested = {}
+        self.leaderboard = Leaderboard(size=leaderboard_size)
+        self.score_cache = ScoreCache(score_cache) if score_cache else None
+        self._pipeline = None
+        self._listeners = []
+        self._pushed = []
+        self._leased = deque()
+        self._asked = False
+        self._arrived = None
+        self._writer = None
+
+    @property
+    def pipeline(self):
+        if self._pipeline is None:
+            self._pipeline = ScoringPipeline(self.url, concurrency=self.concurrency, rate=self.rate, cache=self.score_cache, language=self.language)
+        return self._pipeline
+
+    @property
+    def solved(self):
+        return self.leaderboard.best()[1] >= MAX_SCORE
+
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+
+    def emit(self, kind, **details):
+        event = Event(kind, self.language, **details)
+        for listener in self._listeners:
+            listener(event)
+
+    async def run(self):
+        """Score leased words until the coordinator is done or goes away."""
+        if self.running:
+            return
+        self.running, self.stopping = True, False
+        self._arrived = asyncio.Event()
+        reader, self._writer = await open_connection(self.address)
+        listener = None
+        try:
+            if self.pipeline.puzzle is None:
+                try:
+                    await self.pipeline.stats()
+                except (httpx.HTTPError, ValueError):
+                    pass
+            send(self._writer, 'hello', language=self.language, puzzle=self.pipeline.puzzle)
+            reply = await receive(reader)
+            if reply is None or reply['op'] == 'error':
+                raise RuntimeError(reply['message'] if reply else "The coordinator closed the connection")
+            for word in self._pushed:
+                send(self._writer, 'push', word=word)
+            self._pushed = []
+
+            listener = asyncio.ensure_future(self.listen(reader))
+            self.emit('started')
+            await self.pipeline.run(
+                self.next_candidate,
+                self.handle_result,
+                should_stop=lambda: self.stopping or self.done,
+            )
+        finally:
+            self.running = False
+            if listener is not None:
+                listener.cancel()
+            self._writer.close()
+        if self.solved:
+            self.emit('solved')
+        self.emit('stopped')
+
+    async def listen(self, reader):
+        while (message := await receive(reader)) is not None:
+            if message['op'] == 'lease':
+                self._leased.extend(message['words'])
+                self._asked = False
+            elif message['op'] == 'done':
+                self.done = True
+                if message['word']:
+                    self.leaderboard.update(message['word'], message['score'])
+            self._arrived.set()
+        self.done = True
+        self._arrived.set()
+
+    def stop(self):
+        self.stopping = True
+        if self._arrived is not None:
+            self._arrived.set()
+
+    def push(self, word):
+        """Have the coordinator queue a word at the front."""
+        if self._writer is not None and self.running:
+            send(self._writer, 'push', word=word)
+        else:
+            self._pushed.append(word)
+
+    async def next_candidate(self):
+        """The next leased word, asking for a batch when none is left, or None once done."""
+        while not self._leased:
+            if self.done or self.stopping:
+                return None
+            if not self._asked:
+                send(self._writer, 'lease', n=self.concurrency)
+                self._asked = True
+            self._arrived.clear()
+            await self._arrived.wait()
+        return self._leased.popleft()
+
+    def handle_result(self, word, data):
+        send(self._writer, 'result', word=word, data=data)
+        if data is None:
+            return
+        if 'p' in data:
+            self.last_result = {word: data['p']}
+            self.words_tested[word] = float(data['p'])
+            self.leaderboard.update(word, self.words_tested[word])
+        elif 'e' not in data:
+            self.words_tested[word] = 0.0
+        self.emit('result', word=word, data=data)
+
+    def close(self):
+        if self.score_cache is not None:
+            self.score_cache.close()
+
+    async def aclose(self):
+        self.close()
+        if self._pipeline is not None:
+            await self._pipeline.aclose()
+
+
+def on_event(event, coordinator):
+    if event.kind == 'notice':
+        print(event.message)
+    elif event.kind == 'result':
+        best_word, best_value = coordinator.solver.leaderboard.best()
+        print(f"\r{len(coordinator.solver.words_tested)} tries | best {best_word} {best_value:.2f} | "
+              f"{len(coordinator.workers)} workers, {len(coordinator.leases)} words leased", end="", flush=True)
+    elif event.kind == 'solved':
+        print(f"\nSolved: {coordinator.solver.leaderboard.best()[0]}")
+
+
+async def main(args):
+    solver = Solver(args.language, args.url or languages[args.language]['url'], languages[args.language]['code'],
+                    mode=args.mode, nearby_index=args.nearby_index)
+    coordinator = Coordinator(solver, lease_timeout=args.lease_timeout)
+    solver.subscribe(lambda event: on_event(event, coordinator))
+    try:
+        word = await solver.yesterdays_word()
+        if word:
+            await solver.queue_nearby(word)
+    except httpx.HTTPError:
+        pass
+    try:
+        await coordinator.serve(args.listen)
+    finally:
+        await solver.aclose()
+    print()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Share the search of one puzzle between several bots')
+    parser.add_argument('-l', '--language', help='Language', type=str, choices=languages.keys(), default='en')
+    parser.add_argument('-u', '--url', help='Base URL of the website, e.g. a local_server.py', type=str)
+    parser.add_argument('--listen', help='Unix socket path, or host:port to listen on over TCP', type=str, required=True)
+    parser.add_argument('-m', '--mode', help='Search mode', type=str, choices=MODES, default='lifo')
+    parser.add_argument('--lease-timeout', help='Seconds a worker has to score a leased word', type=float, default=LEASE_TIMEOUT)
+    parser.add_argument('--nearby-index', help='SQLite file every /nearby list is kept in, and neighbours looked up from', type=str, default=nearby_index_path)
+    parser.add_argument('--no-nearby-index', help='Neither keep nor use past /nearby lists', dest='nearby_index', action='store_const', const=None)
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+
+import math
+import mmap
+import os
+import random
+from array import array
+
+MAGIC = b'CMTXDICT'
+HEADER_SIZE = 16
+
+# Header flag: a frequency per word follows the offsets, and words are sorted by decreasing frequency
+FREQUENCIES = 1
+
+
+def binary_path(txt_path):
+    return os.path.splitext(txt_path)[0] + ".bin"
+
+
+def frequency_path(txt_path):
+    """Corpus frequencies written by `build_dictionary.py`, one `word<TAB>count` per line."""
+    return os.path.splitext(txt_path)[0] + ".freq"
+
+
+def read_frequencies(path):
+    frequencies = {}
+    with open(path, mode="r", encoding="utf-8") as f:
+        for line in f:
+            word, _, count = line.rstrip("\n").rpartition("\t")
+            if word:
+                frequencies[word] = int(count)
+    return frequencies
+
+
+def build(txt_path):
+    """Write the binary form of a dictionary: header, word offsets, frequencies if known, then the UTF-8 words back to back.
+
+    With a `.freq` file next to the `.txt`, words are ranked by decreasing
+    frequency, words it does not list coming last in their `.txt` order.
+    """
+    with open(txt_path, mode="r", encoding="utf-8") as f:
+        words = [word for word in dict.fromkeys(f.read().splitlines()) if word]
+
+    flags = 0
+    frequencies = array('I')
+    if os.path.exists(frequency_path(txt_path)):
+        counts = read_frequencies(frequency_path(txt_path))
+        words.sort(key=lambda word: -counts.get(word, 0))
+        frequencies = array('I', (min(counts.get(word, 0), 0xFFFFFFFF) for word in words))
+        flags |= FREQUENCIES
+
+    words = [word.encode("utf-8") for word in words]
+    offsets = array('I', [0])
+    for word in words:
+        offsets.append(offsets[-1] + len(word))
+
+    path = binary_path(txt_path)
+    with open(path + ".tmp", mode="wb") as f:
+        f.write(MAGIC + len(words).to_bytes(4, 'little') + flags.to_bytes(4, 'little'))
+        f.write(offsets.tobytes())
+        f.write(frequencies.tobytes())
+        f.write(b"".join(words))
+    os.replace(path + ".tmp", path)
+
+
+class Dictionary:
+    """Read-only, memory-mapped word list of a language.
+
+    Opening only maps the file: words are decoded one at a time when indexed,
+    so a language costs nothing until it is used. The binary form is rebuilt
+    from the `.txt` and `.freq` whenever either is newer. A dictionary with
+    frequencies is `ranked`: its words come most frequent first, and so do
+    its samples.
+    """
+
+    def __init__(self, txt_path):
+        path = binary_path(txt_path)
+        sources = [p for p in (txt_path, frequency_path(txt_path)) if os.path.exists(p)]
+        if not os.path.exists(path) or any(os.path.getmtime(path) < os.path.getmtime(p) for p in sources):
+            build(txt_path)
+
+        with open(path, mode="rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a dictionary")
+
+        self._count = int.from_bytes(self._map[len(MAGIC):len(MAGIC) + 4], 'little')
+        self.ranked = bool(int.from_bytes(self._map[len(MAGIC) + 4:HEADER_SIZE], 'little') & FREQUENCIES)
+        self._blob = HEADER_SIZE + 4 * (self._count + 1)
+        self._offsets = memoryview(self._map)[HEADER_SIZE:self._blob].cast('I')
+        self._frequencies = None
+        if self.ranked:
+            self._frequencies = memoryview(self._map)[self._blob:self._blob + 4 * self._count].cast('I')
+            self._blob += 4 * self._count
+
+    def __len__(self):
+        return self._count
+
+    def frequency(self, i):
+        """Corpus frequency of the i-th word, 0 when unknown."""
+        return self._frequencies[i] if self._frequencies is not None else 0
+
+    def __getitem__(self, i):
+        return self._map[self._blob + self._offsets[i]:self._blob + self._offsets[i + 1]].decode("utf-8")
+
+    def __iter__(self):
+        return (self[i] for i in range(self._count))
+
+    def sample(self, exclude=(), rng=random):
+        """All the words, most frequent first if ranked, in random order otherwise, without building a list."""
+        return DictionarySample(self, exclude, rng, shuffle=not self.ranked)
+
+
+class DictionarySample:
+    """Iterator over a dictionary in the order of a random affine permutation.
+
+    Index k maps to (a * k + b) mod n with a coprime to n, which visits every
+    word exactly once in O(1) memory. Without `shuffle`, words come in order.
+    Words in `exclude` are skipped.
+    """
+
+    def __init__(self, dictionary, exclude=(), rng=random, shuffle=True):
+        self.dictionary = dictionary
+        self.exclude = exclude
+        n = len(dictionary)
+        self.a = 1
+        if shuffle and n > 2:
+            self.a = rng.randrange(1, n)
+            while math.gcd(self.a, n) != 1:
+                self.a = rng.randrange(1, n)
+        self.b = rng.randrange(n) if shuffle and n else 0
+        self.k = 0
+
+    def __len__(self):
+        """Words not drawn yet, excluded ones included."""
+        return len(self.dictionary) - self.k
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        n = len(self.dictionary)
+        while self.k < n:
+            word = self.dictionary[(self.a * self.k + self.b) % n]
+            self.k += 1
+            if word not in self.exclude:
+                return word
+        raise StopIteration
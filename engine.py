@@ -0,0 +1,384 @@
+#!/usr/bin/env python
+
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+
+try:
+    from bs4 import BeautifulSoup
+except ImportError:
+    raise ImportError("Please install bs4 with 'pip install bs4' ")
+
+try:
+    import httpx
+except ImportError:
+    raise ImportError("Please install httpx with 'pip install httpx' ")
+
+from dictionary import Dictionary
+from frontier import Frontier
+from history import open_history
+from journal import Journal
+from leaderboard import Leaderboard
+from lexicon import cache as lexical_cache
+from metrics import metrics
+from morphology import Vocabulary
+from nearby import NearbyIndex
+from normalize import Either, Forms, WordScores, WordSet, surface
+from scorecache import ScoreCache
+from scoring import DEFAULT_CONCURRENCY, DEFAULT_RATE, ScoringPipeline
+from solver import MANUAL_PRIORITY, MAX_FAILED_STREAK, MAX_FAILURES, MAX_SCORE, NEARBY_SIZE, RETRY_PRIORITY, VARIANT_SCORE, expand, expand_nearby, expand_variants, next_candidate, triangulate
+from tombstones import Tombstones
+from triangulation import open_triangulator
+
+dict_path = 'Dicts'
+days_path = "Days"
+
+# What a solver tells its subscribers: `kind` is one of 'started', 'result',
+# 'solved', 'stopped', 'rollover' or 'notice', `word` / `data` describe a
+# scored word and `message` a notice or the new puzzle
+Event = namedtuple('Event', ['kind', 'language', 'word', 'data', 'message'], defaults=(None, None, None))
+
+
+class Solver:
+    """Everything needed to solve one language's puzzle, shared with no other language.
+
+    A solver owns its frontier, its scores, its journal and tombstones and its
+    HTTP client, so several can run at once as concurrent tasks on one event
+    loop. Front ends never touch that state while a search runs: they
+    `subscribe` to the events it emits and call `run`, `stop` and `submit`.
+    """
+
+    def __init__(self, language, url, code, mode='lifo', concurrency=DEFAULT_CONCURRENCY, rate=DEFAULT_RATE, fsync='batch', leaderboard_size=50, score_cache=None, nearby_index=None):
+        self.language = language
+        self.url = url
+        self.code = code
+        self.mode = mode
+        self.concurrency = concurrency
+        self.rate = rate
+        self.fsync = fsync
+        self.leaderboard_size = leaderboard_size
+        self.running = False
+        self.stopping = False
+
+        os.makedirs(f"{days_path}/{language}", exist_ok=True)
+        self.dict_file = f"{dict_path}/{language}.txt"
+        if not os.path.exists(self.dict_file):
+            os.makedirs(dict_path, exist_ok=True)
+            open(self.dict_file, mode="w", encoding="utf-8").close()
+
+        # Variants of a word, by case or separator, are the same word
+        # everywhere but in the tombstones, as the website may reject
+        # `buckhead` and take `Buckhead`
+        self.words_not_found = Tombstones(self.dict_file, key=lambda word: surface(word, language))
+        self.forms = Forms(self.dict_file, language)
+        self.dictionary = None
+        self._vocabulary = None
+        self.history = None
+        self.triangulator = None
+        # Scores fetched by any run, on this machine, for the same puzzle
+        self.score_cache = ScoreCache(score_cache) if score_cache else None
+        # Neighbours from every /nearby list fetched so far, a second source of candidates
+        self.nearby_index = NearbyIndex(nearby_index) if nearby_index else None
+        self._pipeline = None
+        self._listeners = []
+        self.start_day()
+        metrics.collect(self.collect_metrics)
+
+    def start_day(self, day=None):
+        """Open the journal of `day`, today by default, with an empty queue.
+
+        Only the state of one puzzle is reset: the dictionary, the word
+        vectors, the history, the caches and the HTTP client stay warm.
+        """
+        day = day or datetime.now().date()
+        self.day = day
+        self.today_file_path = f"{days_path}/{self.language}/{day.strftime('%d-%m-%Y')}.txt"
+        self.yesterday_file_path = f"{days_path}/{self.language}/{(day - timedelta(days=1)).strftime('%d-%m-%Y')}.txt"
+        self.journal = Journal(self.today_file_path, fsync=self.fsync)
+        self.words_tested = WordScores(self.language, self.journal.load())
+        self.leaderboard = Leaderboard(size=self.leaderboard_size, words=self.words_tested)
+        # A key popped once is never handed out again, so a rejected `march`
+        # must not hide `March`: twins are told apart once popped instead
+        self.words_to_test = Frontier(key=lambda word: surface(word, self.language))
+        # Words sent and not answered yet, never sent twice
+        self.in_flight = WordSet(self.language)
+        # Priorities the words in flight were popped with
+        self.priorities = {}
+        # Failed attempts per word, and words in a row that failed
+        self.failures = {}
+        self.failed_streak = 0
+        # Hot words whose variants wait for the vocabulary
+        self.variants_pending = []
+        self.last_result = {}
+        self.seeded = False
+        if self.triangulator is not None:
+            self.triangulator.reset()
+
+    def new_day(self, puzzle=None):
+        """Move on to the next puzzle, once the search of the previous one is over.
+
+        The day file is named after today's date, or the day after the
+        previous one when the puzzle changes before midnight here.
+        """
+        self.close_day()
+        if self.words_not_found.compacted:
+            # Mapped before the compaction: reopened, and so rebuilt, by the next `prepare`
+            self.dictionary = None
+            self._vocabulary = None
+            self.words_not_found.forget_compacted()
+        if self.history is not None:
+            self.history.ingest()
+        self.start_day(max(datetime.now().date(), self.day + timedelta(days=1)))
+        if self._pipeline is not None:
+            self._pipeline.puzzle = puzzle
+        self.emit('rollover', message=f"Puzzle {puzzle}" if puzzle is not None else None)
+
+    @property
+    def pipeline(self):
+        # Opened on first use, so it binds to the event loop it is used from
+        if self._pipeline is None:
+            self._pipeline = ScoringPipeline(self.url, concurrency=self.concurrency, rate=self.rate, cache=self.score_cache, language=self.language)
+        return self._pipeline
+
+    @property
+    def vocabulary(self):
+        """The vocabulary of the dictionary, None until `prepare` has it built."""
+        if self._vocabulary is None or not self._vocabulary.done():
+            return None
+        return self._vocabulary.result()
+
+    def build_vocabulary(self):
+        """Build the vocabulary of the dictionary on a thread, as it takes most of a second."""
+        future = Future()
+
+        def build():
+            try:
+                future.set_result(Vocabulary(dictionary, self.language))
+            except Exception as e:
+                future.set_exception(e)
+
+        dictionary = self.dictionary
+        self._vocabulary = future
+        threading.Thread(target=build, daemon=True).start()
+
+    @property
+    def solved(self):
+        return self.leaderboard.best()[1] >= MAX_SCORE
+
+    def subscribe(self, listener):
+        """Call `listener(event)` for every event emitted from now on."""
+        self._listeners.append(listener)
+
+    def emit(self, kind, **details):
+        event = Event(kind, self.language, **details)
+        for listener in self._listeners:
+            listener(event)
+
+    def prepare(self):
+        """Open the dictionary, start building its vocabulary, and open the word vectors in vector mode, on first need.
+
+        With a history store, the words most often hot on past days are tried
+        before the dictionary, and the words never in the top 1000 are left
+        out of it.
+        """
+        if self.dictionary is None:
+            self.dictionary = Dictionary(self.dict_file)
+            self.history = open_history()
+        if self._vocabulary is None:
+            self.build_vocabulary()
+
+        if not self.seeded:
+            exclude = self.words_not_found
+            if self.history is not None:
+                hot, cold = self.history.priors(self.language)
+                exclude = Either(WordSet(self.language, cold), self.words_not_found)
+                # Behind anything scored words queue, ahead of the dictionary
+                self.words_to_test.extend(reversed([w for w in hot if w not in self.words_tested]))
+            self.words_to_test.add_seeds(self.dictionary.sample(exclude=exclude))
+            self.seeded = True
+
+        if self.mode == 'vector' and self.triangulator is None:
+            self.triangulator = open_triangulator(self.language)
+            if self.triangulator is None:
+                self.mode = 'best'
+                self.emit('notice', message=f"No word vectors for {self.language}, run build_vectors.py. Falling back to best mode.")
+
+    async def run(self):
+        """Search until solved, stopped or out of candidates."""
+        if self.running or self.solved:
+            return
+        self.prepare()
+        self.running, self.stopping = True, False
+        self.failed_streak = 0
+        self.emit('started')
+        try:
+            # The puzzle number keys the score cache, the first score would tell it too
+            if self.score_cache is not None and self.pipeline.puzzle is None:
+                try:
+                    await self.pipeline.stats()
+                except (httpx.HTTPError, ValueError):
+                    pass
+            await self.pipeline.run(
+                self.next_candidate,
+                self.handle_result,
+                should_stop=lambda: self.stopping or self.solved,
+            )
+        finally:
+            self.running = False
+            self.save()
+        if self.solved:
+            self.emit('solved')
+        self.emit('stopped')
+
+    def stop(self):
+        """Stop handing out words; the requests in flight still complete."""
+        self.stopping = True
+
+    def push(self, word, priority=MANUAL_PRIORITY):
+        """Queue a word for the search, typed words going first by default."""
+        if word not in self.words_tested:
+            self.words_to_test.push(word, priority)
+
+    async def submit(self, word):
+        """Score a typed word: at the front of the search if one runs, right away otherwise.
+
+        Words already tested, known to be unknown or being scored are not
+        sent again: returns False for them, True once the word is queued or
+        scored.
+        """
+        word = surface(word, self.language)
+        if word in self.words_tested or word in self.in_flight or word in self.words_not_found:
+            metrics.count('coalesced', language=self.language)
+            return False
+        if self.running:
+            self.words_to_test.push(word, MANUAL_PRIORITY)
+            return True
+
+        self.in_flight.add(word)
+        try:
+            data = await self.pipeline.score(word)
+        finally:
+            self.in_flight.discard(word)
+        self.handle_result(word, data)
+        return True
+
+    async def yesterdays_word(self):
+        """Yesterday's word as shown on the home page, or None."""
+        response = await self.pipeline.client.get("/")
+        found = BeautifulSoup(response.content.decode("utf-8"), "html.parser").select('#yesterday')
+        return found[0].text if found else None
+
+    async def queue_nearby(self, word):
+        """Queue the neighbours of `word`, the closest ending up in front, and keep them in the index."""
+        neighbours = list(await self.pipeline.nearby(word))
+        if self.nearby_index is not None:
+            # Each entry is (word, rank in ‰, similarity in %)
+            self.nearby_index.add(self.language, word, [(w, similarity / 100) for w, _, similarity in neighbours])
+        for w, _, _ in reversed(neighbours):
+            if w not in self.words_tested:
+                self.words_to_test.push(w)
+
+    def next_candidate(self):
+        with metrics.timer('pop_seconds', language=self.language):
+            word = None
+            while word is None:
+                popped, priority = next_candidate(self.words_to_test, self.words_tested, self.in_flight)
+                if popped is None:
+                    return None
+                # In the spellings the website took before first, then as it is
+                word = next((w for w in self.forms.surfaces(popped) if w not in Either(self.words_tested, self.in_flight, self.words_not_found)), None)
+        self.in_flight.add(word)
+        # Queued again at that priority if its request fails
+        self.priorities[word] = RETRY_PRIORITY if priority is None else priority
+        return word
+
+    def handle_result(self, word, data):
+        """Record the score of a word and queue its lexical field."""
+        self.in_flight.discard(word)
+        priority = self.priorities.pop(word, RETRY_PRIORITY)
+        if data is None:
+            self.failures[word] = self.failures.get(word, 0) + 1
+            self.failed_streak += 1
+            if self.failures[word] < MAX_FAILURES:
+                self.words_to_test.push(word, priority)
+            if self.failed_streak == MAX_FAILED_STREAK:
+                self.emit('notice', message=f"The last {MAX_FAILED_STREAK} words could not be scored, {self.url} looks down: stopping.")
+                self.stop()
+            return
+        self.failed_streak = 0
+        metrics.count('guesses', language=self.language)
+
+        if 'e' not in data:
+            self.forms.accept(word)
+
+        if 'p' in data:
+            self.last_result = {word: data['p']}
+            self.words_tested[word] = float(data['p'])
+            self.journal.append(word, self.words_tested[word])
+            self.leaderboard.update(word, self.words_tested[word])
+
+            with metrics.timer('expand_seconds', language=self.language):
+                expand(word, self.words_tested[word], self.words_tested, self.words_to_test, self.code, mode=self.mode)
+            if self.nearby_index is not None:
+                with metrics.timer('nearby_seconds', language=self.language):
+                    neighbours = self.nearby_index.neighbours(self.language, word, NEARBY_SIZE)
+                expand_nearby(self.words_tested[word], neighbours, self.words_tested, self.words_to_test, mode=self.mode)
+            if self.words_tested[word] >= VARIANT_SCORE:
+                self.variants_pending.append(word)
+
+        elif 'e' in data:
+            self.words_not_found.add(word)
+        else:
+            self.words_tested[word] = 0.0
+            self.journal.append(word, self.words_tested[word])
+
+        if self.variants_pending and self.vocabulary is not None:
+            with metrics.timer('variants_seconds', language=self.language):
+                for w in self.variants_pending:
+                    expand_variants(w, self.words_tested[w], self.vocabulary, self.words_tested, self.words_to_test, self.language, mode=self.mode)
+            self.variants_pending = []
+
+        if self.mode == 'vector' and self.triangulator is not None and 's' in data:
+            with metrics.timer('triangulate_seconds', language=self.language):
+                triangulate(word, data['s'], self.triangulator, self.words_tested, self.words_to_test)
+
+        self.emit('result', word=word, data=data)
+
+    def save(self):
+        with metrics.timer('save_seconds', language=self.language):
+            self.journal.compact()
+            self.words_not_found.save()
+            self.forms.save()
+
+    def collect_metrics(self):
+        """Gauges read when the metrics are exported rather than on every guess."""
+        metrics.gauge('queue_size', len(self.words_to_test), language=self.language)
+        metrics.gauge('words_tested', len(self.words_tested), language=self.language)
+        metrics.gauge('best_score', self.leaderboard.best()[1], language=self.language)
+        metrics.gauge('lexical_cache_hit_rate', lexical_cache.hit_rate)
+        if self._pipeline is not None:
+            metrics.gauge('request_rate_limit', self._pipeline.rate, language=self.language)
+        if self.score_cache is not None:
+            metrics.gauge('score_cache_hit_rate', self.score_cache.hit_rate, language=self.language)
+
+    def close_day(self):
+        """Save, wait for a compaction of the dictionary and stop the journal writer."""
+        self.save()
+        self.words_not_found.join()
+        self.journal.close()
+
+    def close(self):
+        """`close_day`, then close the score cache and the nearby index."""
+        self.close_day()
+        if self.score_cache is not None:
+            self.score_cache.close()
+        if self.nearby_index is not None:
+            self.nearby_index.close()
+
+    async def aclose(self):
+        """`close`, then close the HTTP client."""
+        self.close()
+        if self._pipeline is not None:
+            await self._pipeline.aclose()
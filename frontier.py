@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+
+import heapq
+import itertools
+
+
+def same(word):
+    return word
+
+
+class Frontier:
+    """Queue of the words still to test.
+
+    Words pop highest priority first and, among equal priorities, newest
+    first, so with the default priority it behaves like the plain list it
+    replaces. Membership is O(1), a word is never queued twice and pushing a
+    queued word moves it to the front unless it already sits higher. Pops are
+    O(log n): stale heap entries left behind by moves are skipped lazily and
+    swept out once they outnumber the live ones.
+
+    Seeds, such as a dictionary sample, are drawn lazily once no queued word
+    has a non-negative priority. They are not queued, so they are not part of
+    the membership test, but a seed is never handed out twice.
+
+    With a `key` function, words with the same key are the same word: the
+    form pushed last is the one handed out.
+    """
+
+    def __init__(self, words=(), seeds=(), key=None):
+        self.key = key or same
+        self._counter = itertools.count()
+        self._entries = {}
+        for word in words:
+            self._entries[self.key(word)] = (0.0, next(self._counter), word)
+        self._heap = [(-priority, -seq, word) for priority, seq, word in self._entries.values()]
+        heapq.heapify(self._heap)
+        self._popped = set()
+        self.add_seeds(seeds)
+
+    def __len__(self):
+        return len(self._entries) + len(self._seeds) + (self._peeked is not None)
+
+    def __bool__(self):
+        return bool(self._entries) or self._peek() is not None
+
+    def __contains__(self, word):
+        return self.key(word) in self._entries
+
+    def __iter__(self):
+        return (word for _, _, word in self._entries.values())
+
+    def priority(self, word):
+        """Priority a queued word will be popped with."""
+        return self._entries[self.key(word)][0]
+
+    def push(self, word, priority=0.0):
+        """Queue a word, or move it to the front of its priority if it is already queued.
+
+        A queued word is never lowered: pushing it with a smaller priority
+        than the one it holds is a no-op.
+        """
+        key = self.key(word)
+        if key in self._entries and self._entries[key][0] > priority:
+            return
+        seq = next(self._counter)
+        self._entries[key] = (priority, seq, word)
+        heapq.heappush(self._heap, (-priority, -seq, word))
+        if len(self._heap) > 2 * len(self._entries) + 1024:
+            self._compact()
+
+    def extend(self, words, priority=0.0):
+        """Push every word in order, so the last one ends up at the front."""
+        for word in words:
+            self.push(word, priority)
+
+    def add_seeds(self, seeds):
+        """Fall back on `seeds`, a sized iterable, after the queued words."""
+        self._seeds = seeds
+        self._seed_iterator = iter(seeds)
+        self._peeked = None
+
+    def pop(self):
+        """Remove and return the word at the front."""
+        return self.popitem()[0]
+
+    def popitem(self):
+        """Remove and return the word at the front and its priority, None for a seed."""
+        while self._heap and self._entries.get(self.key(self._heap[0][2])) != (-self._heap[0][0], -self._heap[0][1], self._heap[0][2]):
+            heapq.heappop(self._heap)
+
+        if self._heap and (self._heap[0][0] <= 0 or self._peek() is None):
+            priority, _, word = self._entries.pop(self.key(heapq.heappop(self._heap)[2]))
+        elif self._peek() is not None:
+            word, priority, self._peeked = self._peeked, None, None
+        else:
+            raise IndexError("pop from empty frontier")
+
+        self._popped.add(self.key(word))
+        return word, priority
+
+    def discard(self, word):
+        """Drop a word from the queue if it is there."""
+        self._entries.pop(self.key(word), None)
+
+    def _peek(self):
+        """Next seed that is neither queued nor already popped, or None."""
+        while self._peeked is None or self.key(self._peeked) in self._entries or self.key(self._peeked) in self._popped:
+            self._peeked = next(self._seed_iterator, None)
+            if self._peeked is None:
+                return None
+        return self._peeked
+
+    def _compact(self):
+        self._heap = [(-priority, -seq, word) for priority, seq, word in self._entries.values()]
+        heapq.heapify(self._heap)
@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+
+"""Every guess of every day, in columns, and what can be learnt from them.
+
+The day files of `Days/<lang>/` are folded into `Days/history.npz`, one row
+per guess: word id, score, order of the guess within its day, day and
+language. Only day files new or changed since the last run are read again.
+Queries run over whole columns with NumPy:
+
+    python history.py ingest
+    python history.py top -l fr --above 900
+    python history.py tries
+    python history.py cold -l en --days 10
+"""
+
+import argparse
+import json
+import os
+import re
+from datetime import date
+
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError("Please install numpy with 'pip install numpy' ")
+
+from journal import journal_path, replay
+
+days_path = "Days"
+history_path = f"{days_path}/history.npz"
+
+DAY_FILE = re.compile(r"^(\d{2})-(\d{2})-(\d{4})\.txt$")
+EPOCH = date(1970, 1, 1)
+
+MAX_SCORE = 1000.0
+# Scores counted as a hit by `top` and the seeding priors
+HOT_SCORE = 900.0
+# Days a word must have been tried on, and never in the top 1000, to be left out of the seeds
+COLD_DAYS = 10
+# Words tried first by the seeding priors
+PRIOR_SIZE = 200
+
+COLUMNS = ('word', 'score', 'order', 'day', 'language')
+
+
+def day_number(name):
+    """Days since 1970 of a `dd-mm-yyyy.txt` day file."""
+    day, month, year = DAY_FILE.match(name).groups()
+    return (date(int(year), int(month), int(day)) - EPOCH).days
+
+
+def day_files(path=days_path):
+    """(language, relative path, modification time) of every day file."""
+    if not os.path.isdir(path):
+        return
+    for language in sorted(os.listdir(path)):
+        if not os.path.isdir(f"{path}/{language}"):
+            continue
+        for name in sorted(os.listdir(f"{path}/{language}")):
+            if DAY_FILE.match(name):
+                file_path = f"{path}/{language}/{name}"
+                mtimes = [os.path.getmtime(p) for p in (file_path, journal_path(file_path)) if os.path.exists(p)]
+                yield language, f"{language}/{name}", max(mtimes)
+
+
+def open_history(path=history_path):
+    """The history store, or None if `history.py ingest` never ran."""
+    return History(path) if os.path.exists(path) else None
+
+
+class History:
+    """Columns of guesses, with the vocabulary and languages their ids index.
+
+    The whole store is one `.npz` replaced atomically, so readers never see
+    a half-written ingest. Scores are the website's ‰ ranks: 0 means the word
+    was outside the top 1000 that day.
+    """
+
+    def __init__(self, path=history_path):
+        self.path = path
+        self.words = []
+        self.languages = []
+        self.files = {}
+        self.columns = {
+            'word': np.zeros(0, dtype=np.int32),
+            'score': np.zeros(0, dtype=np.float32),
+            'order': np.zeros(0, dtype=np.int32),
+            'day': np.zeros(0, dtype=np.int32),
+            'language': np.zeros(0, dtype=np.int8),
+        }
+        if os.path.exists(path):
+            with np.load(path) as store:
+                self.columns = {name: store[name] for name in COLUMNS}
+                self.words = store['words'].tolist()
+                self.languages = store['languages'].tolist()
+                self.files = json.loads(str(store['files']))
+
+    def __len__(self):
+        return len(self.columns['word'])
+
+    def ingest(self, path=days_path):
+        """Read the day files added or changed since the last ingest. Returns how many were read."""
+        ids = {word: i for i, word in enumerate(self.words)}
+        changed = [(language, name, mtime) for language, name, mtime in day_files(path) if self.files.get(name) != mtime]
+        if not changed:
+            return 0
+
+        keep = np.ones(len(self), dtype=bool)
+        new = {name: [] for name in COLUMNS}
+        for language, name, mtime in changed:
+            if language not in self.languages:
+                self.languages.append(language)
+            language_id = self.languages.index(language)
+            day = day_number(os.path.basename(name))
+            # A day seen before is read again in full, as it may have grown
+            keep &= ~((self.columns['language'] == language_id) & (self.columns['day'] == day))
+
+            # Day files keep the order the words were guessed in
+            scores = replay(f"{path}/{name}")
+            for word in scores:
+                if word not in ids:
+                    ids[word] = len(self.words)
+                    self.words.append(word)
+            new['word'].append(np.fromiter((ids[word] for word in scores), dtype=np.int32, count=len(scores)))
+            new['score'].append(np.fromiter(scores.values(), dtype=np.float32, count=len(scores)))
+            new['order'].append(np.arange(len(scores), dtype=np.int32))
+            new['day'].append(np.full(len(scores), day, dtype=np.int32))
+            new['language'].append(np.full(len(scores), language_id, dtype=np.int8))
+            self.files[name] = mtime
+
+        for name in COLUMNS:
+            self.columns[name] = np.concatenate([self.columns[name][keep], *new[name]])
+        self.save()
+        return len(changed)
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp.npz"
+        np.savez(tmp_path, **self.columns, words=np.array(self.words, dtype=str),
+                 languages=np.array(self.languages, dtype=str), files=np.array(json.dumps(self.files)))
+        os.replace(tmp_path, self.path)
+
+    def rows(self, language=None):
+        """Mask of the rows of `language`, or of every language."""
+        if language is None:
+            return np.ones(len(self), dtype=bool)
+        if language not in self.languages:
+            return np.zeros(len(self), dtype=bool)
+        return self.columns['language'] == self.languages.index(language)
+
+    def top(self, language=None, above=HOT_SCORE, limit=20):
+        """Words that scored at least `above` on the most days, as (word, days)."""
+        rows = self.rows(language) & (self.columns['score'] >= above)
+        days = np.bincount(self.columns['word'][rows], minlength=len(self.words))
+        best = np.argsort(-days, kind='stable')[:limit]
+        return [(self.words[i], int(days[i])) for i in best if days[i]]
+
+    def tries(self, language=None):
+        """Tries of every day, up to the winning word when solved, as (language, date, tries, solved)."""
+        rows = self.rows(language)
+        keys = self.columns['language'][rows].astype(np.int64) << 32 | self.columns['day'][rows]
+        days, inverse = np.unique(keys, return_inverse=True)
+        tries = np.bincount(inverse, minlength=len(days))
+        solved_at = np.full(len(days), np.iinfo(np.int32).max, dtype=np.int64)
+        solved = self.columns['score'][rows] >= MAX_SCORE
+        np.minimum.at(solved_at, inverse[solved], self.columns['order'][rows][solved])
+        solved = solved_at < np.iinfo(np.int32).max
+        tries = np.where(solved, solved_at + 1, tries)
+        return [(self.languages[key >> 32], date.fromordinal(EPOCH.toordinal() + (key & 0xFFFFFFFF)), int(n), bool(s))
+                for key, n, s in zip(days.tolist(), tries, solved)]
+
+    def cold(self, language=None, min_days=COLD_DAYS):
+        """Words tried on at least `min_days` days and never in the top 1000, most tried first, as (word, days)."""
+        rows = self.rows(language)
+        words = self.columns['word'][rows]
+        days = np.bincount(words, minlength=len(self.words))
+        hot = np.bincount(words[self.columns['score'][rows] > 0], minlength=len(self.words))
+        cold = np.flatnonzero((days >= min_days) & (hot == 0))
+        cold = cold[np.argsort(-days[cold], kind='stable')]
+        return [(self.words[i], int(days[i])) for i in cold]
+
+    def priors(self, language, size=PRIOR_SIZE, min_days=COLD_DAYS):
+        """Seeding priors: the words most often hot, to try first, and the words always cold, to skip."""
+        return [word for word, _ in self.top(language, limit=size)], {word for word, _ in self.cold(language, min_days)}
+
+
+def main(args):
+    history = History(args.history)
+    read = history.ingest(args.days)
+    if args.command == 'ingest':
+        print(f"{read} day files read, {len(history)} guesses over {len(history.files)} days")
+    elif args.command == 'top':
+        for word, days in history.top(args.language, args.above, args.limit):
+            print(f"{word}\t{days}")
+    elif args.command == 'tries':
+        rows = history.tries(args.language)
+        for language, day, tries, solved in rows:
+            print(f"{language}\t{day.isoformat()}\t{tries}\t{'solved' if solved else 'unsolved'}")
+        for language in [args.language] if args.language else history.languages:
+            tries = [n for l, _, n, solved in rows if l == language and solved]
+            if tries:
+                print(f"{language}: {np.mean(tries):.1f} tries on average over {len(tries)} solved days, median {np.median(tries):.0f}")
+    elif args.command == 'cold':
+        for word, days in history.cold(args.language, args.days_tried)[:args.limit]:
+            print(f"{word}\t{days}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Columnar history of every guess, and queries over it')
+    parser.add_argument('command', help='ingest the day files, words most often above a score, tries per day or words never in the top 1000',
+                        choices=('ingest', 'top', 'tries', 'cold'))
+    parser.add_argument('-l', '--language', help='Only this language', type=str)
+    parser.add_argument('--above', help='Score counted as a hit by top', type=float, default=HOT_SCORE)
+    parser.add_argument('--days', dest='days_tried', help='Days a word must have been tried on to be cold', type=int, default=COLD_DAYS)
+    parser.add_argument('-n', '--limit', help='Words listed', type=int, default=20)
+    parser.add_argument('--history', help='History store', type=str, default=history_path)
+    parser.add_argument('--days-path', dest='days', help='Directory of the day files', type=str, default=days_path)
+    main(parser.parse_args())
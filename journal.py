@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+
+import json
+import os
+import queue
+import threading
+import time
+
+FSYNC_POLICIES = ('always', 'batch', 'never')
+
+BATCH_SIZE = 64
+FLUSH_INTERVAL = 1.0
+COMPACT_EVERY = 1000
+
+
+def journal_path(snapshot_path):
+    return os.path.splitext(snapshot_path)[0] + ".journal"
+
+
+def write_snapshot(snapshot_path, words):
+    """Atomically replace a day file with the given scores."""
+    with open(snapshot_path + ".tmp", mode="w", encoding="utf-8") as f:
+        json.dump(words, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(snapshot_path + ".tmp", snapshot_path)
+
+
+def replay(snapshot_path):
+    """Scores of a day: its snapshot, then every record journaled since."""
+    words = {}
+    if os.path.exists(snapshot_path) and os.path.getsize(snapshot_path) > 0:
+        with open(snapshot_path, mode="r", encoding="utf-8") as f:
+            words = json.load(f)
+
+    if os.path.exists(journal_path(snapshot_path)):
+        with open(journal_path(snapshot_path), mode="r", encoding="utf-8") as f:
+            for line in f:
+                # A torn last line from a crash mid-write is skipped: `word\t12` may be cut from `word\t12.5`
+                if not line.endswith("\n"):
+                    break
+                word, _, score = line[:-1].partition("\t")
+                try:
+                    words[word] = float(score)
+                except ValueError:
+                    continue
+    return words
+
+
+def drop_torn_tail(path):
+    """Cut a journal back to its last complete line, so new records do not extend a torn one."""
+    if not os.path.exists(path):
+        return
+    with open(path, mode="rb+") as f:
+        content = f.read()
+        if content and not content.endswith(b"\n"):
+            f.truncate(content.rfind(b"\n") + 1)
+
+
+class Journal:
+    """Append-only log of the words scored during a day.
+
+    `append` only queues the record: a background thread writes records in
+    batches of `batch_size`, or after `flush_interval` seconds, then fsyncs
+    according to `fsync` (`always` after every record, `batch` after every
+    batch, `never` leaving it to the OS). A crash therefore loses at most one
+    batch. Every `compact_every` records, and on close, the journal is folded
+    into the day file, which keeps the plain JSON format of `loadDict`.
+    """
+
+    def __init__(self, snapshot_path, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL, fsync='batch', compact_every=COMPACT_EVERY):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}, not {fsync!r}")
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path(snapshot_path)
+        self.batch_size = 1 if fsync == 'always' else batch_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.compact_every = compact_every
+        self.words = {}
+        self._queue = queue.Queue()
+        self._thread = None
+
+    def load(self):
+        """Replay the day and start the writer. Returns a copy the caller may mutate."""
+        self.words = replay(self.snapshot_path)
+        if self._thread is None:
+            drop_torn_tail(self.journal_path)
+            self._thread = threading.Thread(target=self._run, name=f"journal-{self.snapshot_path}", daemon=True)
+            self._thread.start()
+        return dict(self.words)
+
+    def append(self, word, score):
+        self._queue.put(('record', word, score))
+
+    def compact(self):
+        """Fold the journal into the day file, on the writer thread."""
+        self._queue.put(('compact',))
+
+    def flush(self):
+        """Block until everything appended so far is written."""
+        if self._thread is not None:
+            done = threading.Event()
+            self._queue.put(('flush', done))
+            done.wait()
+
+    def close(self):
+        """Write what is left, compact and stop the writer."""
+        if self._thread is not None:
+            self._queue.put(('close',))
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        since_compaction = 0
+        with open(self.journal_path, mode="a", encoding="utf-8") as f:
+            while True:
+                batch = [self._queue.get()]
+                deadline = time.monotonic() + self.flush_interval
+                while batch[-1][0] == 'record' and len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                    except queue.Empty:
+                        break
+
+                records = [command for command in batch if command[0] == 'record']
+                if records:
+                    f.write("".join(f"{word}\t{score}\n" for _, word, score in records))
+                    f.flush()
+                    if self.fsync != 'never':
+                        os.fsync(f.fileno())
+                    for _, word, score in records:
+                        self.words[word] = score
+                    since_compaction += len(records)
+
+                command = batch[-1]
+                if command[0] in ('compact', 'close') or since_compaction >= self.compact_every:
+                    write_snapshot(self.snapshot_path, self.words)
+                    f.seek(0)
+                    f.truncate()
+                    since_compaction = 0
+                if command[0] == 'flush':
+                    command[1].set()
+                elif command[0] == 'close':
+                    break
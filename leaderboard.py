@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+
+import bisect
+import itertools
+
+
+class Leaderboard:
+    """The `size` best scores, kept sorted as they arrive.
+
+    Rows are ordered by decreasing score, then by arrival, like sorting the
+    scores dictionary would. Words scoring 0 are never ranked. `dirty` tells
+    whether anything moved since the last `changes`.
+    """
+
+    def __init__(self, size=50, words=None):
+        self.size = size
+        self.dirty = True
+        self._counter = itertools.count()
+        self._rows = []
+        self._keys = {}
+        self._changed_from = 0
+        for word, score in (words or {}).items():
+            self.update(word, score)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def rows(self):
+        return [(word, -score) for score, _, word in self._rows]
+
+    def best(self):
+        """(word, score) of the first row, ('', 0) while nothing is ranked."""
+        return (self._rows[0][2], -self._rows[0][0]) if self._rows else ('', 0)
+
+    def update(self, word, score):
+        if word in self._keys:
+            if -self._keys[word][0] == score:
+                return
+            i = bisect.bisect_left(self._rows, self._keys.pop(word))
+            del self._rows[i]
+            self._changed_from = min(self._changed_from, i)
+            self.dirty = True
+
+        if score <= 0 or (len(self._rows) >= self.size and -score >= self._rows[-1][0]):
+            return
+
+        key = (-score, next(self._counter), word)
+        i = bisect.bisect_left(self._rows, key)
+        self._rows.insert(i, key)
+        self._keys[word] = key
+        if len(self._rows) > self.size:
+            del self._keys[self._rows.pop()[2]]
+
+        self._changed_from = min(self._changed_from, i)
+        self.dirty = True
+
+    def changes(self):
+        """(position, word, score) of the rows that moved since the last call, the first changed row onwards.
+
+        Meant for a front end updating its rows in place.
+        """
+        start = self._changed_from
+        self._changed_from = len(self._rows)
+        self.dirty = False
+        return [(position + 1, word, -score) for position, (score, _, word) in enumerate(self._rows[start:], start)]
@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+
+import json
+import os
+import sqlite3
+from collections import OrderedDict
+
+dict_path = 'Dicts'
+
+# Relations in order of preference when a word is reached more than once
+RELATIONS = ('synonym', 'hyponym', 'hypernym')
+
+# Deepest hypernym / hyponym level stored in the index
+MAX_DEPTH = 2
+
+# Lexical fields kept in memory
+CACHE_SIZE = 65536
+
+wordnet = None
+indexes = {}
+
+
+class LexicalCache:
+    """Size-bounded LRU cache of lexical fields keyed by (word, lang).
+
+    Each entry remembers the depth it was walked to and answers any request
+    for that depth or less. Words without a lexical field are cached too.
+    """
+
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    @property
+    def hit_rate(self):
+        return self.hits / (self.hits + self.misses) if self.hits + self.misses else 0.0
+
+    def get(self, word, lang, depth):
+        entry = self.entries.get((word, lang))
+        if entry is None or entry[0] < depth:
+            self.misses += 1
+            return None
+        self.entries.move_to_end((word, lang))
+        self.hits += 1
+        return entry[1]
+
+    def put(self, word, lang, depth, relations):
+        self.entries[(word, lang)] = (depth, relations)
+        self.entries.move_to_end((word, lang))
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def load(self, file_path):
+        """Warm the cache from a file written by `save`, if there is one."""
+        if not os.path.exists(file_path) or os.path.getsize(file_path) == 0:
+            return
+        with open(file_path, mode="r", encoding="utf-8") as f:
+            for word, lang, depth, field in json.load(f):
+                self.put(word, lang, depth, decode_relations(field) if field else {})
+
+    def save(self, file_path):
+        with open(file_path + ".tmp", mode="w", encoding="utf-8") as f:
+            json.dump([[word, lang, depth, encode_relations(relations)] for (word, lang), (depth, relations) in self.entries.items()], f)
+        os.replace(file_path + ".tmp", file_path)
+
+
+cache = LexicalCache()
+
+
+def index_path(lang):
+    return f"{dict_path}/{lang[:-1]}.lex.sqlite"
+
+
+def load_wordnet():
+    """Import NLTK's WordNet on first use, only needed without an index."""
+    global wordnet
+    if wordnet is None:
+        try:
+            import nltk
+            from nltk.corpus import wordnet as corpus
+        except ImportError:
+            raise ImportError("Please install nltk with 'pip install nltk' ")
+
+        nltk.download("wordnet", quiet=True)
+        nltk.download('omw-1.4', quiet=True)
+        wordnet = corpus
+    return wordnet
+
+
+def open_index(lang):
+    """Read-only connection to the lexical-field index of a language, or None if it was not built."""
+    if lang not in indexes:
+        path = index_path(lang)
+        if os.path.exists(path):
+            indexes[lang] = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+            indexes[lang].execute("PRAGMA mmap_size = 268435456")
+        else:
+            indexes[lang] = None
+    return indexes[lang]
+
+
+def encode_relations(relations):
+    """One `<relation><depth><word>` line per word, e.g. `01dog` for a synonym at depth 1."""
+    return "\n".join(f"{RELATIONS.index(relation)}{level}{word}" for word, (relation, level) in relations.items())
+
+
+def decode_relations(field, depth=MAX_DEPTH):
+    relations = {}
+    for line in field.split("\n"):
+        if int(line[1]) <= depth:
+            relations[line[2:]] = (RELATIONS[int(line[0])], int(line[1]))
+    return relations
+
+
+def walk_wordnet(word, lang, depth=1):
+    """Walk WordNet for the lexical field of a word, see `get_lexical_relations`."""
+    relations = {}
+
+    def add(lemmas, relation, level):
+        for lemma in lemmas:
+            name = lemma.name().replace('_', '-')
+            rank = (level, RELATIONS.index(relation))
+            if name not in relations or rank < (relations[name][1], RELATIONS.index(relations[name][0])):
+                relations[name] = (relation, level)
+
+    # Get synsets (sense groupings)
+    for synset in load_wordnet().synsets(word, lang=lang):
+        if not synset:
+            continue
+
+        # Add synonyms
+        add(synset.lemmas(lang=lang), 'synonym', 1)
+
+        # Add hypernyms (broader terms) and hyponyms (narrower terms)
+        broader, narrower = [synset], [synset]
+        for level in range(1, depth + 1):
+            broader = [hypernym for s in broader for hypernym in s.hypernyms()]
+            narrower = [hyponym for s in narrower for hyponym in s.hyponyms()]
+            for hypernym in broader:
+                add(hypernym.lemmas(lang=lang), 'hypernym', level)
+            for hyponym in narrower:
+                add(hyponym.lemmas(lang=lang), 'hyponym', level)
+
+    return relations
+
+
+def log_error(word, error):
+    with open('error.log', mode='a', encoding='utf-8') as f:
+        f.write(f'{word}: {error}\n')
+
+
+def get_lexical_relations(word, lang, depth=1):
+    """Map each word of the lexical field to the (relation, depth) it was reached by.
+
+    Synonyms are at depth 1, hypernyms and hyponyms at the number of levels
+    walked up or down the WordNet hierarchy, up to `depth`. Served from the
+    cache, then from the index built by `build_index.py` when there is one,
+    from NLTK otherwise. Only words WordNet has no synsets for are cached
+    empty: a lookup that fails is logged to `error.log` and tried again
+    next time.
+    """
+    relations = cache.get(word, lang, depth)
+    if relations is None:
+        index = open_index(lang)
+        if index is None:
+            try:
+                relations = walk_wordnet(word, lang, depth)
+            except Exception as e:
+                # A missing corpus or a passing error says nothing of the word: not cached
+                log_error(word, e)
+                return {}
+            cache.put(word, lang, depth, relations)
+        else:
+            row = index.execute("SELECT field FROM lexical_fields WHERE word = ?", (word,)).fetchone()
+            relations = decode_relations(row[0]) if row else {}
+            cache.put(word, lang, MAX_DEPTH, relations)
+
+    return {w: (relation, level) for w, (relation, level) in relations.items() if level <= depth}
+
+
+def get_lexical_field(word, lang):
+    # Collect lexical field words
+    return list(get_lexical_relations(word, lang))
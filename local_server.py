@@ -0,0 +1,223 @@
+#!/usr/bin/env python
+
+"""Offline stand-in for the Cemantix / Cemantle website.
+
+Serves the endpoints documented in api.md for one language, scoring words
+against a chosen target with a deterministic character-trigram similarity
+instead of the real word embeddings, so the bots can be load-tested,
+benchmarked and regression-tested without touching the real site:
+
+    python local_server.py -l fr -t montée -p 8001 --latency 0.05 --error-rate 0.01 --max-rate 10
+    python cemantix_bot.py -l fr -u http://127.0.0.1:8001
+    CEMANTIX_FR_URL=http://127.0.0.1:8001 python app.py
+"""
+
+import argparse
+import heapq
+import json
+import math
+import random
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+from dictionary import Dictionary
+
+dict_path = 'Dicts'
+
+NEARBY_SIZE = 1000
+
+unknown_word = {
+    'en': "I don't know this word.",
+    'fr': "Je ne connais pas le mot <i>{word}</i>.",
+}
+
+
+def trigrams(word):
+    padded = f"^{word}$"
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def similarity(a, b):
+    """Cosine similarity of the trigram sets of two words, in [0, 1]."""
+    a, b = trigrams(a), trigrams(b)
+    return len(a & b) / math.sqrt(len(a) * len(b))
+
+
+class Game:
+    """The puzzle of the day: a target word and the vocabulary it is ranked against."""
+
+    def __init__(self, language, words, target, yesterday='', puzzle=1):
+        self.language = language
+        self.words = set(words) | {target}
+        self.target = target
+        self.yesterday = yesterday
+        self.puzzle = puzzle
+        self.found = 0
+        self.lock = threading.Lock()
+        self.ranks = {word: NEARBY_SIZE - rank for rank, (word, _) in enumerate(self.neighbours(target))}
+
+    def similarity(self, a, b):
+        return similarity(a, b)
+
+    @lru_cache(maxsize=64)
+    def neighbours(self, word):
+        """The NEARBY_SIZE words closest to `word`, itself first, as (word, similarity)."""
+        return heapq.nsmallest(NEARBY_SIZE, ((w, self.similarity(word, w)) for w in self.words), key=lambda x: (-x[1], x[0] != word, x[0]))
+
+    def stats(self):
+        return {"n": self.puzzle, "v": self.found}
+
+    def score(self, word):
+        if word not in self.words:
+            return {"e": unknown_word[self.language].format(word=word)}
+        if word == self.target:
+            with self.lock:
+                self.found += 1
+        data = {"n": self.puzzle, "s": round(self.similarity(word, self.target), 4), "v": self.found}
+        if word in self.ranks:
+            data["p"] = self.ranks[word]
+        return data
+
+    def nearby(self, word):
+        if word not in self.words:
+            return []
+        return [[w, NEARBY_SIZE - rank, round(s * 100, 2)] for rank, (w, s) in enumerate(self.neighbours(word))]
+
+
+class VectorGame(Game):
+    """A game scored with the word vectors of `build_vectors.py` instead of trigrams."""
+
+    def __init__(self, language, target, yesterday='', puzzle=1):
+        from triangulation import Triangulator, vectors_path, vocabulary_path
+
+        self.vectors = Triangulator(vectors_path(language), vocabulary_path(language))
+        super().__init__(language, self.vectors.rows, target, yesterday, puzzle)
+
+    def similarity(self, a, b):
+        rows = self.vectors.rows
+        return float(self.vectors.vectors[rows[a]] @ self.vectors.vectors[rows[b]])
+
+    @lru_cache(maxsize=64)
+    def neighbours(self, word):
+        similarities = self.vectors.vectors @ self.vectors.vectors[self.vectors.rows[word]]
+        similarities[self.vectors.rows[word]] = 2.0
+        best = similarities.argsort()[::-1][:NEARBY_SIZE]
+        return [(self.vectors.words[int(row)], min(1.0, float(similarities[row]))) for row in best]
+
+
+class Handler(BaseHTTPRequestHandler):
+    game = None
+    latency = 0.0
+    jitter = 0.0
+    error_rate = 0.0
+    max_rate = 0.0
+    verbose = False
+    # Arrival times of the requests of the last second, shared by every handler
+    arrivals = deque()
+    lock = threading.Lock()
+
+    def do_GET(self):
+        if self.path == '/stats':
+            self.reply(self.game.stats())
+        elif self.path == '/':
+            self.reply(f'<html><body><b id="yesterday">{self.game.yesterday}</b></body></html>', content_type="text/html")
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        word = parse_qs(self.rfile.read(int(self.headers.get('Content-Length', 0))).decode("utf-8")).get('word', [''])[0]
+        if self.path == '/score':
+            self.reply(self.game.score(word))
+        elif self.path == '/nearby':
+            self.reply(self.game.nearby(word))
+        else:
+            self.send_error(404)
+
+    def overloaded(self):
+        """Whether more than `max_rate` requests arrived within the last second."""
+        now = time.monotonic()
+        with self.lock:
+            while self.arrivals and now - self.arrivals[0] > 1.0:
+                self.arrivals.popleft()
+            self.arrivals.append(now)
+            return len(self.arrivals) > self.max_rate
+
+    def reply(self, data, content_type="application/json"):
+        if self.max_rate and self.overloaded():
+            self.send_error(429)
+            return
+
+        time.sleep(max(0.0, random.gauss(self.latency, self.jitter)))
+
+        if random.random() < self.error_rate:
+            # Injected failures: a server error or, like the real site sometimes, an empty body
+            if random.random() < 0.5:
+                self.send_error(500)
+                return
+            body = b""
+        else:
+            body = (data if isinstance(data, str) else json.dumps(data)).encode("utf-8")
+
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.verbose:
+            super().log_message(format, *args)
+
+
+def serve(game, host='127.0.0.1', port=8000, latency=0.0, jitter=0.0, error_rate=0.0, max_rate=0.0, verbose=False):
+    """Start serving `game` in a background thread, returns the server to `shutdown()`."""
+    handler = type('GameHandler', (Handler,), {'game': game, 'latency': latency, 'jitter': jitter, 'error_rate': error_rate, 'max_rate': max_rate, 'verbose': verbose,
+                                               'arrivals': deque(), 'lock': threading.Lock()})
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Offline stand-in for the Cemantix website')
+    parser.add_argument('-l', '--language', help='Language', type=str, choices=unknown_word.keys(), default='en')
+    parser.add_argument('-t', '--target', help='Word to find (random by default)', type=str)
+    parser.add_argument('-y', '--yesterday', help="Yesterday's word shown on the home page (random by default)", type=str)
+    parser.add_argument('-n', '--puzzle', help='Puzzle number', type=int, default=1)
+    parser.add_argument('--seed', help='Seed picking the random words', type=int, default=0)
+    parser.add_argument('--host', help='Host', type=str, default='127.0.0.1')
+    parser.add_argument('-p', '--port', help='Port', type=int, default=8000)
+    parser.add_argument('--latency', help='Mean response latency in seconds', type=float, default=0.0)
+    parser.add_argument('--jitter', help='Standard deviation of the latency in seconds', type=float, default=0.0)
+    parser.add_argument('--error-rate', help='Fraction of responses failing with a 500 or an empty body', type=float, default=0.0)
+    parser.add_argument('--max-rate', help='Answer 429 past this many requests per second (unlimited by default)', type=float, default=0.0)
+    parser.add_argument('--vectors', help='Score with the word vectors of build_vectors.py instead of trigrams', action='store_true')
+    parser.add_argument('--rollover', help='Move on to a new puzzle every this many seconds (never by default)', type=float, default=0.0)
+    parser.add_argument('-v', '--verbose', help='Log every request', action='store_true')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    words = list(Dictionary(f"{dict_path}/{args.language}.vec.txt" if args.vectors else f"{dict_path}/{args.language}.txt"))
+
+    def make_game(target, yesterday, puzzle):
+        if args.vectors:
+            return VectorGame(args.language, target=target, yesterday=yesterday, puzzle=puzzle)
+        return Game(args.language, words, target=target, yesterday=yesterday, puzzle=puzzle)
+
+    game = make_game(args.target or rng.choice(words), args.yesterday or rng.choice(words), args.puzzle)
+    server = serve(game, args.host, args.port, args.latency, args.jitter, args.error_rate, args.max_rate, args.verbose)
+    print(f"Serving {args.language} puzzle {game.puzzle} on http://{args.host}:{args.port}")
+    try:
+        while args.rollover:
+            time.sleep(args.rollover)
+            # Today's word becomes yesterday's, as on the real website at midnight
+            game = make_game(rng.choice(words), game.target, game.puzzle + 1)
+            server.RequestHandlerClass.game = game
+            print(f"Serving {args.language} puzzle {game.puzzle}")
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python
+
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+# Upper bounds of the histogram buckets, in seconds: 0.25 ms to about 68 s
+BUCKETS = tuple(0.00025 * 2 ** i for i in range(19))
+
+# Seconds over which counter rates are averaged
+RATE_WINDOW = 10
+
+EXPORT_INTERVAL = 5.0
+
+NO_TIMER = nullcontext()
+
+
+class Counter:
+    """A count that only goes up, remembering its last `RATE_WINDOW` seconds."""
+
+    def __init__(self):
+        self.value = 0
+        self._seconds = []
+
+    def add(self, n=1):
+        self.value += n
+        now = int(time.monotonic())
+        if self._seconds and self._seconds[-1][0] == now:
+            self._seconds[-1][1] += n
+        else:
+            self._seconds.append([now, n])
+            if len(self._seconds) > RATE_WINDOW + 1:
+                del self._seconds[0]
+
+    def rate(self):
+        """Average increase per second over the last `RATE_WINDOW` seconds."""
+        now = int(time.monotonic())
+        recent = [(second, n) for second, n in self._seconds if now - second < RATE_WINDOW]
+        if not recent:
+            return 0.0
+        # Young counters are averaged over their lifetime, not the whole window
+        return sum(n for _, n in recent) / max(1, now - recent[0][0] + 1)
+
+
+class Histogram:
+    """Durations counted in `BUCKETS`, enough for approximate quantiles."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Value below which a fraction `q` of the observations fall, interpolated within its bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                low = BUCKETS[i - 1] if i else 0.0
+                high = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1] * 2
+                return low + (high - low) * (rank - seen) / n
+            seen += n
+        return BUCKETS[-1]
+
+
+class Timer:
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started)
+
+
+class Metrics:
+    """Counters, gauges and histograms of the hot paths, labelled by language.
+
+    Disabled, every call returns right away and `timer` hands out a shared
+    no-op context manager, so instrumented code costs next to nothing.
+    Collectors registered with `collect` are called before every snapshot,
+    for gauges too costly or too noisy to update on every event.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self._collectors = []
+        self._exporter = None
+
+    @staticmethod
+    def key(name, labels):
+        return (name, tuple(sorted(labels.items())))
+
+    def count(self, name, n=1, **labels):
+        if not self.enabled:
+            return
+        key = self.key(name, labels)
+        if key not in self.counters:
+            self.counters[key] = Counter()
+        self.counters[key].add(n)
+
+    def gauge(self, name, value, **labels):
+        if not self.enabled:
+            return
+        self.gauges[self.key(name, labels)] = value
+
+    def observe(self, name, value, **labels):
+        if not self.enabled:
+            return
+        self.histogram(name, **labels).observe(value)
+
+    def timer(self, name, **labels):
+        """Context manager observing how long its block takes."""
+        if not self.enabled:
+            return NO_TIMER
+        return Timer(self.histogram(name, **labels))
+
+    def histogram(self, name, **labels):
+        key = self.key(name, labels)
+        if key not in self.histograms:
+            self.histograms[key] = Histogram()
+        return self.histograms[key]
+
+    def rate(self, name, **labels):
+        counter = self.counters.get(self.key(name, labels))
+        return counter.rate() if counter is not None else 0.0
+
+    def quantile(self, name, q, **labels):
+        histogram = self.histograms.get(self.key(name, labels))
+        return histogram.quantile(q) if histogram is not None else 0.0
+
+    def collect(self, collector):
+        """Call `collector()` before every snapshot."""
+        self._collectors.append(collector)
+
+    def snapshot(self):
+        """Every metric as plain data, with counter rates and p50 / p99 of the histograms."""
+        for collector in self._collectors:
+            collector()
+        # Copies, as the metrics keep changing while an export thread reads them
+        return {
+            'time': time.time(),
+            'counters': [{'name': name, 'labels': dict(labels), 'value': c.value, 'rate': c.rate()} for (name, labels), c in list(self.counters.items())],
+            'gauges': [{'name': name, 'labels': dict(labels), 'value': value} for (name, labels), value in list(self.gauges.items())],
+            'histograms': [{'name': name, 'labels': dict(labels), 'count': h.count, 'sum': h.sum,
+                            'p50': h.quantile(0.5), 'p99': h.quantile(0.99), 'buckets': list(h.counts)}
+                           for (name, labels), h in list(self.histograms.items())],
+        }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self, prefix='cemantix_'):
+        """The snapshot in the Prometheus text exposition format."""
+        def labels(values, **extra):
+            values = {**values, **extra}
+            return "{" + ",".join(f'{k}="{v}"' for k, v in values.items()) + "}" if values else ""
+
+        snapshot = self.snapshot()
+        lines = []
+        for c in snapshot['counters']:
+            lines.append(f"{prefix}{c['name']}_total{labels(c['labels'])} {c['value']}")
+        for g in snapshot['gauges']:
+            lines.append(f"{prefix}{g['name']}{labels(g['labels'])} {g['value']}")
+        for h in snapshot['histograms']:
+            cumulative = 0
+            for bound, n in zip((*BUCKETS, '+Inf'), h['buckets']):
+                cumulative += n
+                lines.append(f"{prefix}{h['name']}_bucket{labels(h['labels'], le=bound)} {cumulative}")
+            lines.append(f"{prefix}{h['name']}_sum{labels(h['labels'])} {h['sum']}")
+            lines.append(f"{prefix}{h['name']}_count{labels(h['labels'])} {h['count']}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """Atomically write the metrics to `path`, Prometheus text for `.prom`, JSON otherwise."""
+        content = self.to_prometheus() if path.endswith('.prom') else self.to_json()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, mode="w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    def export(self, path, interval=EXPORT_INTERVAL):
+        """Enable the metrics and write them to `path` every `interval` seconds from a daemon thread."""
+        self.enabled = True
+        stop = threading.Event()
+
+        def run():
+            while not stop.wait(interval):
+                self.write(path)
+
+        self._exporter = (threading.Thread(target=run, daemon=True), stop, path)
+        self._exporter[0].start()
+
+    def close(self):
+        """Stop exporting, after a last write."""
+        if self._exporter is not None:
+            thread, stop, path = self._exporter
+            stop.set()
+            thread.join()
+            self.write(path)
+            self._exporter = None
+
+
+metrics = Metrics()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+
+"""Inflections and derived words of a word, by suffix rules, kept to the words of a dictionary.
+
+WordNet links a word to its synonyms and hyponyms, rarely to its own plural,
+feminine, conjugations or derived nouns and adjectives, which the website
+ranks right next to it. `variants` strips every known ending off a word,
+puts every other ending back with the usual spelling changes, and keeps the
+forms a `Vocabulary` knows. The rules overgenerate on purpose: the
+dictionary is the filter.
+"""
+
+import os
+import re
+from functools import lru_cache
+
+from normalize import fold
+
+# Shortest stem left once an ending is stripped
+MIN_STEM = 3
+
+# Variants queued per hot word
+VARIANTS = 20
+
+# Hot words whose variants are kept in memory
+CACHE_SIZE = 4096
+
+VOWELS = "aeiouyàâäéèêëîïôöùûü"
+
+ENDINGS = {
+    'en': (
+        # Plurals, verb forms, comparatives
+        's', 'es', 'ed', 'ing', 'er', 'ers', 'est',
+        # Derived nouns, adjectives and adverbs
+        'ly', 'ness', 'ment', 'ments', 'ion', 'ions', 'ation', 'ations', 'ance', 'ence', 'ity', 'ities',
+        'able', 'ible', 'al', 'ally', 'ful', 'less', 'ic', 'ical', 'ism', 'ist', 'ists', 'ive', 'ous', 'y', 'ize', 'ise',
+    ),
+    'fr': (
+        # Plurals and feminines of nouns and adjectives
+        's', 'x', 'e', 'es', 'al', 'ale', 'ales', 'aux', 'eux', 'euse', 'euses', 'if', 'ifs', 'ive', 'ives',
+        'ier', 'iers', 'ière', 'ières', 'ien', 'iens', 'ienne', 'iennes', 'eur', 'eurs', 'rice', 'rices',
+        # Infinitives, participles and the most common tenses of -er, -ir and -re verbs
+        'er', 'ons', 'ez', 'ent', 'ais', 'ait', 'ions', 'iez', 'aient', 'ai', 'a', 'as', 'era', 'eront', 'erait',
+        'é', 'ée', 'és', 'ées', 'ant', 'ir', 'is', 'it', 'issons', 'issez', 'issent', 'issait', 'issant',
+        'i', 'ie', 'ies', 're', 'u', 'ue', 'us', 'ues',
+        # Derived nouns, adjectives and adverbs
+        'ment', 'ement', 'tion', 'tions', 'ation', 'ations', 'age', 'ages', 'ité', 'ités', 'isme', 'iste', 'istes',
+        'able', 'ables', 'ible', 'ique', 'iques', 'ance', 'ence', 'eau', 'eaux', 'ette', 'ettes',
+    ),
+}
+
+# French endings after which a stem keeps the grave accent of its last syllable: élève, élèves, but élever
+MUTE_ENDINGS = ('e', 'es', 'ent', 's')
+GRAVE = re.compile(f"è([^{VOWELS}]+)$")
+
+
+class Vocabulary:
+    """The canonical forms of the words of a dictionary, to check generated forms against."""
+
+    def __init__(self, words, language):
+        self.language = language
+        self.keys = {fold(word, language) for word in words}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, word):
+        return fold(word, self.language) in self.keys
+
+
+def stems(word, language):
+    """`word` less any of its language's endings, English spelling changes undone."""
+    found = {word}
+    for ending in ENDINGS[language]:
+        if word.endswith(ending) and len(word) - len(ending) >= MIN_STEM:
+            stem = word[:-len(ending)]
+            found.add(stem)
+            if language == 'en':
+                # hoping: hope, happiness: happy, running: run
+                found.add(stem + 'e')
+                if stem[-1] == 'i':
+                    found.add(stem[:-1] + 'y')
+                if stem[-1] == stem[-2] and stem[-1] not in VOWELS:
+                    found.add(stem[:-1])
+    return found
+
+
+def attach(stem, ending, language):
+    """The spellings of `stem` + `ending`: without a final e, with a doubled consonant, with y turned to i."""
+    stems = [stem]
+    if ending[0] in VOWELS:
+        if stem[-1] == 'e':
+            # French always drops it before a vowel, English mostly: hoping, but seeing
+            stems = [stem[:-1]] if language == 'fr' else [stem, stem[:-1]]
+        elif len(stem) > 1 and stem[-1] not in VOWELS and stem[-2] in VOWELS:
+            stems.append(stem + stem[-1])
+    elif language == 'en' and len(stem) > 1 and stem[-1] == 'y' and stem[-2] not in VOWELS:
+        stems.append(stem[:-1] + 'i')
+    if language == 'fr' and ending not in MUTE_ENDINGS:
+        stems = [GRAVE.sub(r"e\1", s) for s in stems]
+    return [s + ending for s in stems]
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def forms(word, language):
+    """Every form reached by swapping an ending of `word` for another, dictionary word or not."""
+    found = set()
+    for stem in stems(word, language):
+        found.add(stem)
+        for ending in ENDINGS[language]:
+            found.update(attach(stem, ending, language))
+    return frozenset(found)
+
+
+def variants(word, language, vocabulary, limit=VARIANTS):
+    """Up to `limit` forms of `word` that `vocabulary` knows, those sharing the longest prefix with it first.
+
+    Spellings an accent-less dictionary cannot tell apart, such as `lente`
+    and `lenté`, count once: the one with the fewest accents, then the closest.
+    """
+    if language not in ENDINGS:
+        return []
+    def closeness(w):
+        return -len(os.path.commonprefix((w, word))), abs(len(w) - len(word)), w
+
+    found = {fold(word, language): word}
+    for w in sorted(forms(word, language), key=lambda w: (sum(not c.isascii() for c in w), closeness(w))):
+        if w in vocabulary:
+            found.setdefault(fold(w, language), w)
+    return sorted(list(found.values())[1:], key=closeness)[:limit]
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+
+import threading
+
+from scorecache import connect
+
+days_path = "Days"
+index_path = f"{days_path}/nearby.sqlite"
+
+# Neighbours looked up per word
+NEIGHBOURS = 50
+
+
+class NearbyIndex:
+    """Every /nearby list ever fetched, as a graph of words weighted by the website's similarity.
+
+    Each list adds an edge from the word to each of its neighbours and back,
+    the similarity being symmetric, so a word that was once near a past
+    target leads back to it. Edges are clustered by (language, word) in a
+    SQLite table, so finding the closest neighbours of a word is one B-tree
+    descent plus a short range scan however many days are stored. WAL mode
+    lets the bot and the TUI share it.
+    """
+
+    def __init__(self, path=index_path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = connect(path)
+        self._connection.execute("CREATE TABLE IF NOT EXISTS nearby (language TEXT, word TEXT, neighbour TEXT, similarity REAL, PRIMARY KEY (language, word, neighbour)) WITHOUT ROWID")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS closest ON nearby (language, word, similarity DESC)")
+
+    def add(self, language, word, neighbours):
+        """Store the (neighbour, similarity) pairs of a /nearby list, similarity in [0, 1]."""
+        edges = []
+        for neighbour, similarity in neighbours:
+            if neighbour != word:
+                edges.append((language, word, neighbour, similarity))
+                edges.append((language, neighbour, word, similarity))
+        with self._lock:
+            self._connection.execute("BEGIN")
+            self._connection.executemany("INSERT OR REPLACE INTO nearby VALUES (?, ?, ?, ?)", edges)
+            self._connection.execute("COMMIT")
+
+    def neighbours(self, language, word, limit=NEIGHBOURS):
+        """The `limit` closest known neighbours of `word`, as (neighbour, similarity), closest first."""
+        with self._lock:
+            return self._connection.execute(
+                "SELECT neighbour, similarity FROM nearby WHERE language = ? AND word = ? ORDER BY similarity DESC LIMIT ?",
+                (language, word, limit),
+            ).fetchall()
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM nearby").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+
+import os
+import unicodedata
+from functools import lru_cache
+
+# Languages whose website takes a word typed without its accents for the same word
+ACCENT_INSENSITIVE = ('fr',)
+
+# WordNet joins multi-word lemmas with `_`, dictionaries with spaces or `-`
+SEPARATORS = str.maketrans({'_': '-', ' ': '-', '’': "'"})
+LIGATURES = str.maketrans({'œ': 'oe', 'æ': 'ae'})
+
+CACHE_SIZE = 262144
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def surface(word, language):
+    """The form of a word sent to the website: NFC, one kind of separator, its own case."""
+    return unicodedata.normalize('NFC', word.strip()).translate(SEPARATORS)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def canonical(word, language):
+    """The identity of a word, to spot duplicates: its surface form lowercased, accents kept, as `côte` is not `côté`."""
+    return surface(word, language).lower()
+
+
+def fold(word, language):
+    """The spelling of a word in a dictionary without accents, where the website takes those: `élevé` and `élève` fold to `eleve`.
+
+    Not cached, for passes over a whole dictionary that would only flush the caches.
+    """
+    word = surface.__wrapped__(word, language).lower()
+    if language in ACCENT_INSENSITIVE:
+        word = "".join(c for c in unicodedata.normalize('NFD', word.translate(LIGATURES)) if not unicodedata.combining(c))
+    return word
+
+
+class WordScores(dict):
+    """Scores by word, where a word is any of its surface forms.
+
+    Iterating, `get` and indexing see the forms the words were scored under,
+    as journaled; `in` matches any variant, so a variant of a scored word
+    is never sent again.
+    """
+
+    def __init__(self, language, scores=()):
+        super().__init__()
+        self.language = language
+        self._keys = {}
+        for word, score in dict(scores).items():
+            self[word] = score
+
+    def __setitem__(self, word, score):
+        self._keys[canonical(word, self.language)] = word
+        super().__setitem__(word, score)
+
+    def __contains__(self, word):
+        return canonical(word, self.language) in self._keys
+
+    def form(self, word):
+        """The form a variant of `word` was scored under, or None."""
+        return self._keys.get(canonical(word, self.language))
+
+
+class WordSet:
+    """Set of words where a word is any of its surface forms."""
+
+    def __init__(self, language, words=()):
+        self.language = language
+        self._keys = {canonical(word, language) for word in words}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, word):
+        return canonical(word, self.language) in self._keys
+
+    def add(self, word):
+        self._keys.add(canonical(word, self.language))
+
+    def discard(self, word):
+        self._keys.discard(canonical(word, self.language))
+
+
+class Either:
+    """In any of several collections."""
+
+    def __init__(self, *collections):
+        self.collections = collections
+
+    def __contains__(self, word):
+        return any(word in collection for collection in self.collections)
+
+
+class Forms:
+    """The accented spellings the website accepted, for the words of a dictionary without accents.
+
+    Typically French, so that once `élève` scored, the `eleve` of an
+    accent-less dictionary is sent as `élève`. Every accepted spelling is
+    kept, `élevé` next to `élève`. New forms are appended to
+    `<dict>.forms.txt` when saved.
+    """
+
+    def __init__(self, dict_file, language):
+        self.language = language
+        self.path = os.path.splitext(dict_file)[0] + ".forms.txt"
+        # Folded spelling -> accepted spellings, first accepted first
+        self.forms = {}
+        self.unsaved = []
+        if os.path.exists(self.path):
+            with open(self.path, mode="r", encoding="utf-8") as f:
+                for word in f.read().splitlines():
+                    if word:
+                        self._add(word)
+
+    def __len__(self):
+        return sum(len(words) for words in self.forms.values())
+
+    def _add(self, word):
+        words = self.forms.setdefault(fold(word, self.language), [])
+        if word in words:
+            return False
+        words.append(word)
+        return True
+
+    def surfaces(self, word):
+        """The forms to try for `word`, in order: the accepted spellings if it has no accents of its own, then itself.
+
+        `sale` is a word too, so `salé` having scored does not stand for it.
+        """
+        word = surface(word, self.language)
+        if canonical(word, self.language) != fold(word, self.language):
+            return [word]
+        forms = self.forms.get(fold(word, self.language), [])
+        return forms if word in forms else [*forms, word]
+
+    def surface(self, word):
+        """The first form to try for `word`."""
+        return self.surfaces(word)[0]
+
+    def accept(self, word):
+        """Remember that the website scored `word`, if it has accents its folded spelling lacks."""
+        if canonical(word, self.language) != fold(word, self.language) and self._add(word):
+            self.unsaved.append(word)
+
+    def save(self):
+        if self.unsaved:
+            with open(self.path, mode="a", encoding="utf-8") as f:
+                f.write("".join(word + "\n" for word in self.unsaved))
+            self.unsaved = []
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+
+import json
+import os
+import sqlite3
+import threading
+
+days_path = "Days"
+cache_path = f"{days_path}/scores.sqlite"
+
+# How long a writer waits for another process to release the database, in seconds
+BUSY_TIMEOUT = 30.0
+
+
+def connect(path):
+    """A connection to the SQLite file at `path`, in WAL mode, usable from any thread under the caller's lock.
+
+    Commits are left to the caller, and writers wait up to `BUSY_TIMEOUT`
+    for each other.
+    """
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    connection = sqlite3.connect(path, timeout=BUSY_TIMEOUT, isolation_level=None, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
+
+
+class ScoreCache:
+    """Every /score reply fetched on this machine, keyed by (language, puzzle, word).
+
+    Lives in SQLite in WAL mode, so any number of bots and TUIs, in as many
+    processes, can read it while one of them writes; writers queue on the
+    database lock for up to `BUSY_TIMEOUT`. Puzzle numbers come from the
+    website itself, so the cache stays right across midnight, time zones and
+    machines sharing the file.
+    """
+
+    def __init__(self, path=cache_path):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connection = connect(path)
+        self._connection.execute("CREATE TABLE IF NOT EXISTS scores (language TEXT, puzzle INTEGER, word TEXT, data TEXT, PRIMARY KEY (language, puzzle, word)) WITHOUT ROWID")
+
+    @property
+    def hit_rate(self):
+        return self.hits / (self.hits + self.misses) if self.hits + self.misses else 0.0
+
+    def get(self, language, puzzle, word):
+        """The reply cached for `word`, or None."""
+        with self._lock:
+            row = self._connection.execute("SELECT data FROM scores WHERE language = ? AND puzzle = ? AND word = ?", (language, puzzle, word)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, language, puzzle, word, data):
+        with self._lock:
+            self._connection.execute("INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?)", (language, puzzle, word, json.dumps(data)))
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
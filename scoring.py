@@ -0,0 +1,244 @@
+#!/usr/bin/env python
+
+import asyncio
+import inspect
+import time
+
+try:
+    import httpx
+except ImportError:
+    raise ImportError("Please install httpx with 'pip install httpx' ")
+
+from metrics import metrics
+
+DEFAULT_CONCURRENCY = 4
+# Requests per second the rate starts at, and the hard ceiling it never exceeds
+START_RATE = 5.0
+DEFAULT_RATE = 20.0
+MIN_RATE = 0.2
+RETRIES = 3
+
+# AIMD: the rate grows by INCREASE requests per second every second the
+# server keeps up, and is multiplied by DECREASE when it pushes back
+INCREASE = 1.0
+DECREASE = 0.7
+# Responses slower than both this and LATENCY_TOLERANCE times the fastest one count as pushback
+TARGET_LATENCY = 1.0
+LATENCY_TOLERANCE = 4.0
+
+
+class RateLimiter:
+    """Token bucket spacing requests `1 / rate` seconds apart on average."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        # Whether a request had to wait for a token since the rate last grew
+        self.limited = False
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if not self.rate:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                self.limited = True
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AdaptiveRateLimiter(RateLimiter):
+    """Token bucket whose rate follows the server, additive increase, multiplicative decrease.
+
+    Every response on time while requests were waiting on the bucket raises
+    the rate a little, so it gains about `increase` requests per second each
+    second, up to `ceiling`. An error, an empty body or a response slower than
+    `target_latency` and several times the fastest response seen cuts it by
+    `decrease`, at most once per `target_latency` so a burst of failures
+    already in flight only counts once. The rate only grows while the bucket
+    is what holds requests back, so it does not creep up while concurrency is
+    the bottleneck.
+    """
+
+    def __init__(self, rate=START_RATE, ceiling=DEFAULT_RATE, floor=MIN_RATE, increase=INCREASE, decrease=DECREASE, target_latency=TARGET_LATENCY):
+        super().__init__(min(rate, ceiling) if ceiling else rate)
+        self.ceiling = ceiling
+        self.floor = floor
+        self.increase = increase
+        self.decrease = decrease
+        self.target_latency = target_latency
+        self.base_latency = float('inf')
+        self.decreased = 0.0
+
+    def success(self, latency):
+        self.base_latency = min(self.base_latency, latency)
+        if latency > max(self.target_latency, LATENCY_TOLERANCE * self.base_latency):
+            self.failure()
+        elif self.rate and self.limited:
+            self.rate = min(self.ceiling or float('inf'), self.rate + self.increase / self.rate)
+            self.limited = False
+
+    def failure(self):
+        now = time.monotonic()
+        if self.rate and now - self.decreased >= self.target_latency:
+            self.rate = max(self.floor, self.rate * self.decrease)
+            self.decreased = now
+
+
+class ScoringPipeline:
+    """Scores words against one language's website over a single pooled client.
+
+    At most `concurrency` requests are in flight at once, and the number
+    started per second adapts to how the server copes, never exceeding `rate`.
+    With a `cache`, words already scored for the current puzzle never reach
+    the network.
+    """
+
+    def __init__(self, url, concurrency=DEFAULT_CONCURRENCY, rate=DEFAULT_RATE, timeout=10.0, cache=None, language=None):
+        self.url = url
+        self.concurrency = concurrency
+        self.cache = cache
+        self.language = language
+        # Puzzle number, learnt from /stats or from any /score reply
+        self.puzzle = None
+        self.limiter = AdaptiveRateLimiter(ceiling=rate)
+        self.client = httpx.AsyncClient(
+            base_url=url,
+            headers={"Origin": url, "Referer": url},
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+            timeout=timeout,
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    @property
+    def rate(self):
+        """Requests per second currently allowed."""
+        return self.limiter.rate
+
+    async def post(self, path, word):
+        """POST a word and return the decoded JSON body.
+
+        Transport errors, server errors, rate limiting and empty bodies slow
+        the pipeline down and are retried; the last one is raised, an empty
+        body as a ValueError.
+        """
+        for attempt in range(RETRIES):
+            await self.limiter.acquire()
+            started = time.monotonic()
+            try:
+                response = await self.client.post(path, data={"word": word})
+                metrics.observe('request_seconds', time.monotonic() - started, language=self.language)
+                if response.status_code == 429 or response.is_server_error:
+                    response.raise_for_status()
+                if not response.content:
+                    raise ValueError(f"Empty response for {word}")
+            except (httpx.TransportError, httpx.HTTPStatusError, ValueError):
+                metrics.count('request_errors', language=self.language)
+                self.limiter.failure()
+                if attempt == RETRIES - 1:
+                    raise
+                await asyncio.sleep(2 ** attempt / 10)
+                continue
+            self.limiter.success(time.monotonic() - started)
+            return response.json()
+
+    async def stats(self):
+        """Puzzle number and number of players who found it, as {"n": ..., "v": ...}."""
+        await self.limiter.acquire()
+        response = await self.client.get("/stats")
+        response.raise_for_status()
+        data = response.json()
+        self.puzzle = data.get('n', self.puzzle)
+        return data
+
+    async def score(self, word):
+        if self.cache is not None and self.puzzle is not None:
+            data = self.cache.get(self.language, self.puzzle, word)
+            metrics.count('score_cache_hits' if data is not None else 'score_cache_misses', language=self.language)
+            if data is not None:
+                return data
+
+        data = await self.post("/score", word)
+        self.puzzle = data.get('n', self.puzzle)
+        if self.cache is not None and self.puzzle is not None:
+            self.cache.put(self.language, self.puzzle, word, data)
+        return data
+
+    async def nearby(self, word):
+        return await self.post("/nearby", word)
+
+    async def run(self, next_word, on_result, should_stop=lambda: False):
+        """Score words from `next_word()` until it runs dry or `should_stop()` is true.
+
+        A producer pops words into a bounded queue, `concurrency` workers score
+        them and a single consumer hands every response to `on_result(word,
+        data)`, so the frontier is only ever touched from one place. `data` is
+        None when the request kept failing. Stopping only stops the producer:
+        responses already in flight are still handed over. `next_word()` may
+        also return an awaitable, for words that come from elsewhere.
+        """
+        pending = asyncio.Queue(maxsize=self.concurrency)
+        results = asyncio.Queue()
+        handled = asyncio.Event()
+        in_flight = 0
+
+        async def produce():
+            nonlocal in_flight
+            while not should_stop():
+                word = next_word()
+                if inspect.isawaitable(word):
+                    word = await word
+                if word is None:
+                    # Responses still in flight may queue more words
+                    if in_flight == 0:
+                        break
+                    handled.clear()
+                    await handled.wait()
+                    continue
+                in_flight += 1
+                await pending.put(word)
+            for _ in range(self.concurrency):
+                await pending.put(None)
+
+        async def work():
+            while (word := await pending.get()) is not None:
+                try:
+                    data = await self.score(word)
+                except (httpx.HTTPError, ValueError):
+                    data = None
+                await results.put((word, data))
+            await results.put(None)
+
+        async def consume():
+            nonlocal in_flight
+            workers = self.concurrency
+            while workers:
+                result = await results.get()
+                if result is None:
+                    workers -= 1
+                    continue
+                in_flight -= 1
+                on_result(*result)
+                handled.set()
+
+        tasks = [asyncio.ensure_future(task) for task in (produce(), consume(), *(work() for _ in range(self.concurrency)))]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
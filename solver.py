@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+
+from lexicon import get_lexical_relations
+from morphology import variants
+
+MAX_SCORE = 1000.0
+
+MODES = ('lifo', 'best', 'vector')
+
+# How much of the parent's score a candidate inherits per relation and per level
+RELATION_DECAY = {
+    'synonym': 1.0,
+    'hyponym': 0.8,
+    'hypernym': 0.6,
+    # Inflections and derived words of the parent
+    'variant': 1.0,
+}
+DEPTH_DECAY = 0.5
+
+# Parents at or above this score are also expanded one level further
+HOT_SCORE = 500.0
+
+# Parents at or above this score also queue their inflections and derived words
+VARIANT_SCORE = 900.0
+
+# Words typed by the user go before anything the search came up with
+MANUAL_PRIORITY = float('inf')
+
+# Words whose request failed are queued again at the priority they were popped
+# with, and dictionary words at this one, ahead of the rest of the dictionary
+RETRY_PRIORITY = 0.0
+
+# Times a word whose request kept failing is tried before it is given up for the day
+MAX_FAILURES = 3
+
+# Words in a row whose request kept failing before a search stops: the website is down
+MAX_FAILED_STREAK = 5
+
+# Candidates queued after each re-ranking of the word vectors
+TRIANGULATION_SIZE = 8
+
+# Neighbours from past /nearby lists queued per scored word
+NEARBY_SIZE = 50
+
+
+def is_solved(words_tested):
+    return max(words_tested.values()) >= MAX_SCORE if words_tested else False
+
+
+def next_candidate(words_to_test, words_tested, in_flight=()):
+    """Pop the next word neither tested yet nor being scored and its priority, None for a seed, or (None, None) once the frontier is empty."""
+    while words_to_test:
+        word, priority = words_to_test.popitem()
+        if word not in words_tested and word not in in_flight:
+            return word, priority
+    return None, None
+
+
+def candidate_priority(score, relation, depth):
+    """Priority of a candidate reached from a word scoring `score`."""
+    return score / MAX_SCORE * RELATION_DECAY[relation] * DEPTH_DECAY ** (depth - 1)
+
+
+def expand(word, score, words_tested, words_to_test, lang, mode='lifo'):
+    """Queue the lexical field of a scored word.
+
+    In `lifo` mode every neighbour goes to the front of the queue. In `best`
+    and `vector` modes neighbours are ranked by the score of the word that
+    produced them, decayed by relation type and depth, so the neighbours of a
+    hot word are tried before those of a cold one.
+    """
+    if mode in ('best', 'vector'):
+        depth = 2 if score >= HOT_SCORE else 1
+        for w, (relation, level) in get_lexical_relations(word, lang, depth=depth).items():
+            if w in words_tested:
+                continue
+            words_to_test.push(w, candidate_priority(score, relation, level))
+    else:
+        for w in get_lexical_relations(word, lang):
+            if w in words_tested:
+                continue
+            words_to_test.push(w)
+
+
+def expand_nearby(score, neighbours, words_tested, words_to_test, mode='lifo'):
+    """Queue the neighbours a scored word had in past /nearby lists, as (word, similarity).
+
+    In `best` and `vector` modes a neighbour inherits the parent's score
+    weighted by its similarity to it, as the website measured it; in `lifo`
+    mode they go to the front, the closest first.
+    """
+    for w, similarity in reversed(neighbours):
+        if w in words_tested:
+            continue
+        if mode in ('best', 'vector'):
+            words_to_test.push(w, score / MAX_SCORE * similarity)
+        else:
+            words_to_test.push(w)
+
+
+def expand_variants(word, score, vocabulary, words_tested, words_to_test, lang, mode='lifo'):
+    """Queue the inflections and derived words of a hot word that the dictionary knows.
+
+    They go to the front in `lifo` mode and rank like synonyms in `best` and
+    `vector` modes, the closest spellings first either way.
+    """
+    for w in reversed(variants(word, lang, vocabulary)):
+        if w in words_tested:
+            continue
+        if mode in ('best', 'vector'):
+            words_to_test.push(w, candidate_priority(score, 'variant', 1))
+        else:
+            words_to_test.push(w)
+
+
+def triangulate(word, similarity, triangulator, words_tested, words_to_test, size=TRIANGULATION_SIZE):
+    """Queue the words whose similarity profile best fits every score observed so far.
+
+    Priorities grow with each observation, so the latest ranking goes before
+    earlier ones and before anything `expand` queued.
+    """
+    if triangulator.observe(word, similarity):
+        for rank, w in enumerate(triangulator.candidates(size, exclude=words_tested)):
+            words_to_test.push(w, triangulator.observations + 1 - rank / size)
@@ -0,0 +1,35 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+
+import cemantix_bot
+
+
+class Pipeline:
+    puzzle = 1
+
+    async def stats(self):
+        return {'n': 1}
+
+
+def test_the_daemon_searches_again_after_an_error(monkeypatch, capsys):
+    searches = []
+
+    async def search(solver):
+        searches.append(solver)
+        if len(searches) == 1:
+            raise httpx.ConnectError("down")
+        await asyncio.sleep(3600)
+
+    monkeypatch.setattr(cemantix_bot, "search", search)
+    solver = SimpleNamespace(language="en", pipeline=Pipeline(), solved=False)
+
+    async def main():
+        watching = asyncio.ensure_future(cemantix_bot.watch(solver, 0.01))
+        await asyncio.sleep(0.1)
+        watching.cancel()
+
+    asyncio.run(main())
+    assert len(searches) == 2
+    assert "ConnectError" in capsys.readouterr().out
@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+
+from coordinator import Coordinator
+from engine import Solver
+
+
+@pytest.fixture
+def coordinator(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "Dicts").mkdir()
+    (tmp_path / "Dicts" / "en.txt").write_text("alpha\nbeta\ngamma\n", encoding="utf-8")
+    solver = Solver("en", "http://127.0.0.1:1", "eng")
+    solver.prepare()
+    coordinator = Coordinator(solver, lease_timeout=30)
+    coordinator.finished = asyncio.Event()
+    yield coordinator
+    solver.close()
+
+
+def expire(coordinator, word):
+    worker, _ = coordinator.leases[word]
+    coordinator.leases[word] = (worker, 0.0)
+
+
+def test_a_late_score_does_not_take_over_a_new_lease(coordinator):
+    [word] = coordinator.lease(1, 1)
+    expire(coordinator, word)
+    coordinator.release_expired()
+    assert coordinator.lease(2, 1) == [word]
+
+    coordinator.complete(1, word, {"p": 10.0})
+    assert coordinator.leases[word][0] == 2
+    assert word not in coordinator.solver.words_tested
+
+    coordinator.complete(2, word, {"p": 20.0})
+    assert coordinator.leases == {}
+    assert coordinator.solver.words_tested[word] == 20.0
+
+
+def test_a_score_sent_after_the_deadline_is_dropped(coordinator):
+    [word] = coordinator.lease(1, 1)
+    expire(coordinator, word)
+
+    coordinator.complete(1, word, {"p": 10.0})
+    assert word not in coordinator.leases
+    assert word not in coordinator.solver.words_tested
+    assert coordinator.lease(2, 1) == [word]
+
+
+def test_a_score_within_the_lease_is_folded_in(coordinator):
+    [word] = coordinator.lease(1, 1)
+    coordinator.complete(1, word, {"p": 10.0})
+    assert coordinator.leases == {}
+    assert coordinator.solver.words_tested[word] == 10.0
@@ -0,0 +1,186 @@
+from concurrent.futures import Future
+
+import pytest
+
+from engine import Solver
+from morphology import Vocabulary
+from solver import MAX_FAILED_STREAK, MAX_FAILURES, VARIANT_SCORE
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "Dicts").mkdir()
+    return tmp_path
+
+
+def write_dictionary(workdir, words, language="en"):
+    (workdir / "Dicts" / f"{language}.txt").write_text("".join(word + "\n" for word in words), encoding="utf-8")
+
+
+def candidates(solver):
+    words = []
+    while (word := solver.next_candidate()) is not None:
+        words.append(word)
+    return words
+
+
+def test_new_day_reopens_the_dictionary_after_a_compaction(workdir):
+    write_dictionary(workdir, ["alpha", "beta", "gamma", "delta"])
+    solver = Solver("en", "http://127.0.0.1:1", "eng")
+    solver.words_not_found.threshold = 1
+    solver.prepare()
+    solver.handle_result("alpha", {"e": "unknown"})
+    solver.handle_result("beta", {"e": "unknown"})
+
+    solver.new_day()
+    solver.prepare()
+
+    assert len(solver.dictionary) == 2
+    assert not solver.words_not_found.compacted
+    assert sorted(candidates(solver)) == ["delta", "gamma"]
+    solver.close()
+
+
+def test_words_are_sent_as_the_dictionary_spells_them(workdir):
+    write_dictionary(workdir, ["Buckhead", "ice_cream"])
+    solver = Solver("en", "http://127.0.0.1:1", "eng")
+    solver.prepare()
+
+    assert sorted(candidates(solver)) == ["Buckhead", "ice-cream"]
+    solver.close()
+
+
+def test_only_the_rejected_spelling_is_buried(workdir):
+    write_dictionary(workdir, ["Buckhead", "march"])
+    solver = Solver("en", "http://127.0.0.1:1", "eng")
+    solver.handle_result("buckhead", {"e": "unknown"})
+    solver.words_not_found.compact()
+
+    assert "Buckhead" not in solver.words_not_found
+    assert (workdir / "Dicts" / "en.txt").read_text(encoding="utf-8").split() == ["Buckhead", "march"]
+    solver.close()
+
+
+def test_a_rejected_spelling_does_not_hide_its_twin(workdir):
+    write_dictionary(workdir, ["march", "March"])
+    solver = Solver("en", "http://127.0.0.1:1", "eng")
+    solver.prepare()
+
+    first = solver.next_candidate()
+    solver.handle_result(first, {"e": "unknown"})
+    second = solver.next_candidate()
+
+    assert sorted([first, second]) == ["March", "march"]
+    solver.close()
+
+
+def test_a_word_that_keeps_failing_is_given_up(workdir):
+    write_dictionary(workdir, [f"seed{i}" for i in range(200)])
+    solver = Solver("en", "http://127.0.0.1:1", "eng")
+    solver.prepare()
+    solver.push("alpha", 0.5)
+    for _ in range(MAX_FAILURES):
+        assert solver.next_candidate() == "alpha"
+        solver.handle_result("alpha", None)
+
+    assert "alpha" not in solver.words_to_test
+    assert solver.next_candidate().startswith("seed")
+    solver.close()
+
+
+def test_the_search_stops_when_every_word_fails(workdir):
+    write_dictionary(workdir, [])
+    solver = Solver("en", "http://127.0.0.1:1", "eng")
+    notices = []
+    solver.subscribe(lambda event: notices.append(event.message) if event.kind == 'notice' else None)
+    for i in range(MAX_FAILED_STREAK - 1):
+        solver.handle_result(f"word{i}", None)
+    assert not solver.stopping
+
+    solver.handle_result("last", None)
+    assert solver.stopping
+    assert len(notices) == 1
+    solver.close()
+
+
+def test_variants_wait_for_the_vocabulary(workdir, monkeypatch):
+    monkeypatch.setattr("engine.expand", lambda *args, **kwargs: None)
+    write_dictionary(workdir, ["walk", "walked", "walking", "zebra"])
+    solver = Solver("en", "http://127.0.0.1:1", "eng")
+    building = Future()
+    monkeypatch.setattr(solver, "build_vocabulary", lambda: setattr(solver, "_vocabulary", building))
+    solver.prepare()
+
+    solver.handle_result("walk", {"p": VARIANT_SCORE})
+    assert "walked" not in solver.words_to_test
+
+    building.set_result(Vocabulary(solver.dictionary, "en"))
+    solver.handle_result("zebra", {"p": 10.0})
+    assert "walked" in solver.words_to_test
+    assert "walking" in solver.words_to_test
+    solver.close()
+
+
+def test_the_vocabulary_is_built_in_the_background(workdir):
+    write_dictionary(workdir, ["walk", "walked"])
+    solver = Solver("en", "http://127.0.0.1:1", "eng")
+    solver.prepare()
+
+    assert "walked" in solver._vocabulary.result(timeout=5)
+    solver.close()
+
+
+def test_words_differing_by_accents_are_both_searched(workdir):
+    write_dictionary(workdir, [], language="fr")
+    solver = Solver("fr", "http://127.0.0.1:1", "fra")
+    solver.push("côte")
+    solver.push("côté")
+    assert solver.words_to_test.key("côte") != solver.words_to_test.key("côté")
+
+    first = solver.next_candidate()
+    solver.handle_result(first, {"p": 10.0})
+    assert "côte" not in solver.words_tested or "côté" not in solver.words_tested
+    second = solver.next_candidate()
+    solver.handle_result(second, {"p": 20.0})
+
+    assert sorted([first, second]) == ["côte", "côté"]
+    assert sorted(solver.words_tested) == ["côte", "côté"]
+    solver.close()
+
+
+def test_an_accent_less_entry_is_tried_after_its_accepted_spelling(workdir):
+    write_dictionary(workdir, ["sale"], language="fr")
+    (workdir / "Dicts" / "fr.forms.txt").write_text("salé\n", encoding="utf-8")
+    solver = Solver("fr", "http://127.0.0.1:1", "fra")
+    solver.prepare()
+
+    assert solver.next_candidate() == "salé"
+    solver.handle_result("salé", {"p": 10.0})
+    solver.push("sale")
+    assert solver.next_candidate() == "sale"
+    solver.close()
+
+
+def test_a_failed_word_is_retried_before_the_dictionary(workdir):
+    write_dictionary(workdir, [f"seed{i}" for i in range(200)])
+    solver = Solver("en", "http://127.0.0.1:1", "eng", mode="best")
+    solver.prepare()
+    solver.push("neighbour", 0.9)
+
+    assert solver.next_candidate() == "neighbour"
+    solver.handle_result("neighbour", None)
+    assert solver.words_to_test.priority("neighbour") == 0.9
+    assert solver.next_candidate() == "neighbour"
+    solver.close()
+
+
+def test_a_failed_seed_is_retried_before_the_other_seeds(workdir):
+    write_dictionary(workdir, [f"seed{i}" for i in range(200)])
+    solver = Solver("en", "http://127.0.0.1:1", "eng")
+    solver.prepare()
+
+    seed = solver.next_candidate()
+    solver.handle_result(seed, None)
+    assert solver.next_candidate() == seed
+    solver.close()
@@ -0,0 +1,87 @@
+from frontier import Frontier
+
+
+def drain(frontier):
+    words = []
+    while frontier:
+        words.append(frontier.pop())
+    return words
+
+
+def test_highest_priority_first_then_newest():
+    frontier = Frontier()
+    frontier.push("low", 0.1)
+    frontier.push("first", 0.5)
+    frontier.push("second", 0.5)
+
+    assert drain(frontier) == ["second", "first", "low"]
+
+
+def test_a_queued_word_is_never_lowered():
+    frontier = Frontier()
+    frontier.push("alpha", 0.9)
+    frontier.push("alpha", 0.1)
+    assert frontier.priority("alpha") == 0.9
+
+    frontier.push("beta", 0.5)
+    frontier.push("beta", 0.8)
+    assert frontier.priority("beta") == 0.8
+    assert drain(frontier) == ["alpha", "beta"]
+
+
+def test_moved_words_leave_stale_entries_behind():
+    frontier = Frontier()
+    for word in ("alpha", "beta", "gamma"):
+        frontier.push(word)
+    frontier.push("alpha")
+    frontier.discard("beta")
+
+    assert len(frontier) == 2
+    assert drain(frontier) == ["alpha", "gamma"]
+
+
+def test_stale_entries_are_swept():
+    frontier = Frontier()
+    for i in range(5000):
+        frontier.push("word", i)
+
+    assert len(frontier._heap) <= 2 * len(frontier._entries) + 1024
+    assert frontier.popitem() == ("word", 4999)
+    assert not frontier
+
+
+def test_seeds_come_after_non_negative_priorities_and_before_negative_ones():
+    frontier = Frontier(seeds=["seed"])
+    frontier.push("late", -1.0)
+    frontier.push("early", 0.0)
+
+    assert frontier.popitem() == ("early", 0.0)
+    assert frontier.popitem() == ("seed", None)
+    assert frontier.popitem() == ("late", -1.0)
+
+
+def test_seeds_are_drawn_lazily_and_never_twice():
+    drawn = []
+
+    def seeds():
+        for word in ("alpha", "beta", "gamma"):
+            drawn.append(word)
+            yield word
+
+    frontier = Frontier()
+    frontier.add_seeds(seeds())
+    assert frontier.pop() == "alpha"
+    assert drawn == ["alpha"]
+
+    frontier.push("beta")
+    assert frontier.pop() == "beta"
+    assert drain(frontier) == ["gamma"]
+
+
+def test_words_with_the_same_key_are_one_word():
+    frontier = Frontier(seeds=["Paris"], key=str.lower)
+    frontier.push("paris")
+    frontier.push("PARIS")
+
+    assert "Paris" in frontier
+    assert drain(frontier) == ["PARIS"]
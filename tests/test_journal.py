@@ -0,0 +1,67 @@
+import json
+import os
+
+import pytest
+
+import journal
+from journal import Journal, journal_path, replay
+
+
+@pytest.fixture
+def day(tmp_path):
+    return str(tmp_path / "01-01-2025.txt")
+
+
+def test_replay_skips_a_torn_last_line(day):
+    with open(journal_path(day), mode="w", encoding="utf-8") as f:
+        f.write("alpha\t1.5\nbeta\t12")
+
+    assert replay(day) == {"alpha": 1.5}
+
+
+def test_records_after_a_torn_line_start_a_line_of_their_own(day):
+    with open(journal_path(day), mode="w", encoding="utf-8") as f:
+        f.write("alpha\t1.5\nbeta\t12")
+    scores = Journal(day)
+    assert scores.load() == {"alpha": 1.5}
+
+    scores.append("gamma", 3.0)
+    scores.flush()
+    assert replay(day) == {"alpha": 1.5, "gamma": 3.0}
+    scores.close()
+
+
+def test_compaction_folds_the_journal_into_the_day_file(day):
+    scores = Journal(day)
+    scores.load()
+    scores.append("alpha", 1.5)
+    scores.append("beta", 2.0)
+    scores.compact()
+    scores.flush()
+
+    with open(day, mode="r", encoding="utf-8") as f:
+        assert json.load(f) == {"alpha": 1.5, "beta": 2.0}
+    assert os.path.getsize(journal_path(day)) == 0
+    assert replay(day) == {"alpha": 1.5, "beta": 2.0}
+    scores.close()
+
+
+@pytest.mark.parametrize("policy, fsyncs", [("always", 10), ("batch", 1), ("never", 0)])
+def test_fsync_policies(day, monkeypatch, policy, fsyncs):
+    calls = []
+    monkeypatch.setattr(journal.os, "fsync", lambda fd: calls.append(fd))
+    scores = Journal(day, fsync=policy)
+    # Queued before the writer starts, so they make a single batch
+    for i in range(10):
+        scores.append(f"word{i}", float(i))
+    scores.load()
+    scores.flush()
+
+    assert len(calls) == fsyncs
+    assert len(replay(day)) == 10
+    scores.close()
+
+
+def test_an_unknown_fsync_policy_is_refused(day):
+    with pytest.raises(ValueError):
+        Journal(day, fsync="sometimes")
@@ -0,0 +1,50 @@
+from leaderboard import Leaderboard
+
+
+def test_rows_are_sorted_by_score_then_arrival():
+    leaderboard = Leaderboard(size=5, words={"alpha": 10.0, "beta": 30.0, "gamma": 10.0, "zero": 0.0})
+
+    assert leaderboard.rows() == [("beta", 30.0), ("alpha", 10.0), ("gamma", 10.0)]
+    assert leaderboard.best() == ("beta", 30.0)
+
+
+def test_the_lowest_row_is_evicted_past_the_size():
+    leaderboard = Leaderboard(size=2)
+    leaderboard.update("alpha", 10.0)
+    leaderboard.update("beta", 20.0)
+    leaderboard.update("gamma", 15.0)
+    leaderboard.update("delta", 5.0)
+
+    assert leaderboard.rows() == [("beta", 20.0), ("gamma", 15.0)]
+    # An evicted word can come back with a better score
+    leaderboard.update("alpha", 30.0)
+    assert leaderboard.rows() == [("alpha", 30.0), ("beta", 20.0)]
+
+
+def test_a_rescored_word_moves():
+    leaderboard = Leaderboard(size=3, words={"alpha": 10.0, "beta": 20.0})
+    leaderboard.update("alpha", 25.0)
+    assert leaderboard.rows() == [("alpha", 25.0), ("beta", 20.0)]
+
+    leaderboard.update("alpha", 0.0)
+    assert leaderboard.rows() == [("beta", 20.0)]
+
+
+def test_changes_start_at_the_first_row_that_moved():
+    leaderboard = Leaderboard(size=5, words={"alpha": 30.0, "beta": 20.0, "gamma": 10.0})
+    assert leaderboard.changes() == [(1, "alpha", 30.0), (2, "beta", 20.0), (3, "gamma", 10.0)]
+    assert not leaderboard.dirty
+    assert leaderboard.changes() == []
+
+    leaderboard.update("delta", 15.0)
+    assert leaderboard.dirty
+    assert leaderboard.changes() == [(3, "delta", 15.0), (4, "gamma", 10.0)]
+
+
+def test_a_score_below_a_full_board_changes_nothing():
+    leaderboard = Leaderboard(size=2, words={"alpha": 30.0, "beta": 20.0})
+    leaderboard.changes()
+    leaderboard.update("gamma", 10.0)
+
+    assert not leaderboard.dirty
+    assert leaderboard.changes() == []
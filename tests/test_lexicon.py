@@ -0,0 +1,41 @@
+import json
+
+import pytest
+
+import lexicon
+
+
+@pytest.fixture
+def no_index(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(lexicon, "cache", lexicon.LexicalCache())
+    monkeypatch.setattr(lexicon, "open_index", lambda lang: None)
+
+
+def test_a_failed_lookup_is_not_cached(no_index, monkeypatch, tmp_path):
+    def missing_corpus():
+        raise LookupError("Resource omw-1.4 not found")
+
+    monkeypatch.setattr(lexicon, "load_wordnet", missing_corpus)
+    assert lexicon.get_lexical_relations("dog", "eng") == {}
+    assert len(lexicon.cache) == 0
+    assert "dog: Resource omw-1.4 not found" in (tmp_path / "error.log").read_text(encoding="utf-8")
+
+    lexicon.cache.save(str(tmp_path / "lexical_cache.json"))
+    assert json.loads((tmp_path / "lexical_cache.json").read_text(encoding="utf-8")) == []
+
+    monkeypatch.setattr(lexicon, "walk_wordnet", lambda word, lang, depth=1: {"hound": ("synonym", 1)})
+    assert lexicon.get_lexical_relations("dog", "eng") == {"hound": ("synonym", 1)}
+
+
+def test_a_word_without_synsets_is_cached(no_index, monkeypatch):
+    calls = []
+
+    def no_synsets(word, lang, depth=1):
+        calls.append(word)
+        return {}
+
+    monkeypatch.setattr(lexicon, "walk_wordnet", no_synsets)
+    assert lexicon.get_lexical_relations("xyzzy", "eng") == {}
+    assert lexicon.get_lexical_relations("xyzzy", "eng") == {}
+    assert calls == ["xyzzy"]
@@ -0,0 +1,47 @@
+from normalize import Forms, WordScores, canonical, fold, surface
+
+
+def test_surface_keeps_the_case():
+    assert surface("Buckhead", "en") == "Buckhead"
+    assert surface(" ice_cream ", "en") == "ice-cream"
+    assert surface("élève", "fr") == "élève"
+
+
+def test_canonical_folds_case_but_keeps_accents():
+    assert canonical("Buckhead", "en") == "buckhead"
+    assert canonical("Élève", "fr") == "élève"
+    assert fold("Élève", "fr") == "eleve"
+    assert fold("élève", "en") == "élève"
+
+
+def test_scored_variants_are_the_same_word():
+    scores = WordScores("fr", {"élève": 900.0})
+    assert "Élève" in scores
+    assert scores.form("Élève") == "élève"
+
+
+def test_words_differing_by_accents_are_different_words():
+    scores = WordScores("fr", {"côté": 900.0})
+    assert "côte" not in scores
+    assert "cote" not in scores
+
+
+def test_forms_only_remember_accents(tmp_path):
+    forms = Forms(str(tmp_path / "fr.txt"), "fr")
+    forms.accept("Paris")
+    forms.accept("élève")
+    assert forms.surface("paris") == "paris"
+    assert forms.surface("eleve") == "élève"
+
+
+def test_forms_keep_every_accepted_spelling(tmp_path):
+    forms = Forms(str(tmp_path / "fr.txt"), "fr")
+    forms.accept("élève")
+    forms.accept("élevé")
+    forms.accept("salé")
+    forms.save()
+
+    forms = Forms(str(tmp_path / "fr.txt"), "fr")
+    assert forms.surfaces("eleve") == ["élève", "élevé", "eleve"]
+    assert forms.surfaces("sale") == ["salé", "sale"]
+    assert forms.surfaces("élevé") == ["élevé"]
@@ -0,0 +1,17 @@
+from nearby import NearbyIndex
+from scorecache import ScoreCache
+
+
+def test_both_stores_open_in_wal_mode(tmp_path):
+    for store in (ScoreCache(str(tmp_path / "a" / "scores.sqlite")), NearbyIndex(str(tmp_path / "b" / "nearby.sqlite"))):
+        assert store._connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        store.close()
+
+
+def test_scores_round_trip(tmp_path):
+    cache = ScoreCache(str(tmp_path / "scores.sqlite"))
+    cache.put("en", 1, "alpha", {"p": 12.5})
+
+    assert cache.get("en", 1, "alpha") == {"p": 12.5}
+    assert cache.get("en", 2, "alpha") is None
+    cache.close()
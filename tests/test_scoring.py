@@ -0,0 +1,114 @@
+import asyncio
+
+import httpx
+import pytest
+
+from scoring import RETRIES, AdaptiveRateLimiter, ScoringPipeline
+
+
+def test_a_failure_cuts_the_rate_once_per_target_latency():
+    limiter = AdaptiveRateLimiter(rate=10.0, ceiling=20.0, decrease=0.5, target_latency=60.0)
+    limiter.failure()
+    limiter.failure()
+
+    assert limiter.rate == 5.0
+
+
+def test_the_rate_never_goes_below_the_floor():
+    limiter = AdaptiveRateLimiter(rate=1.0, floor=0.8, decrease=0.5, target_latency=0.0)
+    limiter.failure()
+    limiter.failure()
+
+    assert limiter.rate == 0.8
+
+
+def test_the_rate_only_grows_while_requests_wait_on_it():
+    limiter = AdaptiveRateLimiter(rate=10.0, ceiling=20.0, increase=1.0)
+    limiter.success(0.1)
+    assert limiter.rate == 10.0
+
+    limiter.limited = True
+    limiter.success(0.1)
+    assert limiter.rate == pytest.approx(10.1)
+    assert not limiter.limited
+
+
+def test_the_rate_never_exceeds_the_ceiling():
+    limiter = AdaptiveRateLimiter(rate=10.0, ceiling=10.05, increase=1.0)
+    limiter.limited = True
+    limiter.success(0.1)
+
+    assert limiter.rate == 10.05
+
+
+def test_a_slow_response_counts_as_a_failure():
+    limiter = AdaptiveRateLimiter(rate=10.0, decrease=0.5, target_latency=1.0)
+    limiter.success(0.2)
+    limiter.limited = True
+    limiter.success(2.0)
+
+    assert limiter.rate == 5.0
+
+
+def pipeline_answering(*responses):
+    """A pipeline whose server gives `responses` in turn, as (status, body)."""
+    answers = iter(responses)
+
+    def handler(request):
+        status, body = next(answers)
+        return httpx.Response(status, content=body)
+
+    pipeline = ScoringPipeline("http://test", rate=0)
+    pipeline.client = httpx.AsyncClient(base_url="http://test", transport=httpx.MockTransport(handler))
+    pipeline.limiter.rate = 0
+    return pipeline
+
+
+def test_errors_are_retried_and_slow_the_pipeline_down():
+    async def main():
+        async with pipeline_answering((503, b""), (429, b""), (200, b'{"p": 12.5, "n": 7}')) as pipeline:
+            pipeline.limiter.rate = 10.0
+            data = await pipeline.score("alpha")
+            return data, pipeline.puzzle, pipeline.rate
+
+    data, puzzle, rate = asyncio.run(main())
+    assert data == {"p": 12.5, "n": 7}
+    assert puzzle == 7
+    assert rate < 10.0
+
+
+def test_the_last_error_is_raised():
+    async def main():
+        async with pipeline_answering(*[(200, b"")] * RETRIES) as pipeline:
+            await pipeline.score("alpha")
+
+    with pytest.raises(ValueError):
+        asyncio.run(main())
+
+
+def test_stopping_hands_over_the_responses_in_flight():
+    started, handled = [], []
+    stopping = False
+
+    async def score(word):
+        started.append(word)
+        await asyncio.sleep(0.01)
+        if word == "word3":
+            raise httpx.ConnectError("down")
+        return {"p": 1.0}
+
+    def on_result(word, data):
+        nonlocal stopping
+        handled.append((word, data))
+        stopping = True
+
+    async def main():
+        async with ScoringPipeline("http://test", concurrency=4, rate=0) as pipeline:
+            pipeline.score = score
+            words = iter(f"word{i}" for i in range(100))
+            await pipeline.run(lambda: next(words, None), on_result, should_stop=lambda: stopping)
+
+    asyncio.run(main())
+    assert len(started) < 100
+    assert sorted(word for word, _ in handled) == sorted(started)
+    assert ("word3", None) in handled
@@ -0,0 +1,66 @@
+from dictionary import Dictionary
+from tombstones import Tombstones
+
+WORDS = ["alpha", "beta", "gamma", "delta"]
+
+
+def write_dictionary(path, words):
+    path.write_text("".join(word + "\n" for word in words), encoding="utf-8")
+
+
+def test_compacted_words_stay_buried_for_a_dictionary_opened_before(tmp_path):
+    dict_file = tmp_path / "en.txt"
+    write_dictionary(dict_file, WORDS)
+    dictionary = Dictionary(str(dict_file))
+    words_not_found = Tombstones(str(dict_file), threshold=1)
+
+    words_not_found.add("alpha")
+    words_not_found.add("beta")
+    words_not_found.save()
+    words_not_found.join()
+
+    assert dict_file.read_text(encoding="utf-8").split() == ["gamma", "delta"]
+    assert len(words_not_found) == 0
+    assert sorted(dictionary.sample(exclude=words_not_found)) == ["delta", "gamma"]
+
+
+def test_forget_compacted(tmp_path):
+    dict_file = tmp_path / "en.txt"
+    write_dictionary(dict_file, WORDS)
+    words_not_found = Tombstones(str(dict_file))
+    words_not_found.add("alpha")
+    words_not_found.compact()
+
+    assert "alpha" in words_not_found
+    words_not_found.forget_compacted()
+    assert "alpha" not in words_not_found
+
+
+def test_buried_words_are_appended_not_rewritten(tmp_path):
+    dict_file = tmp_path / "en.txt"
+    write_dictionary(dict_file, WORDS)
+    words_not_found = Tombstones(str(dict_file))
+    words_not_found.add("beta")
+    words_not_found.save()
+
+    assert dict_file.read_text(encoding="utf-8").split() == WORDS
+    assert "beta" in Tombstones(str(dict_file))
+
+
+def test_words_buried_during_a_compaction_stay_in_the_file(tmp_path):
+    dict_file = tmp_path / "en.txt"
+    write_dictionary(dict_file, WORDS)
+    words_not_found = Tombstones(str(dict_file))
+    words_not_found.add("alpha")
+    words_not_found.add("beta")
+    words_not_found.save()
+    with words_not_found._lock:
+        words_not_found.compact(background=True)
+        words_not_found.add("gamma")
+        assert "alpha" in words_not_found
+    words_not_found.save()
+    words_not_found.join()
+
+    assert dict_file.read_text(encoding="utf-8").split() == ["gamma", "delta"]
+    assert "gamma" in Tombstones(str(dict_file))
+    assert "alpha" not in Tombstones(str(dict_file))
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+
+import os
+import threading
+
+# Tombstones past which saving also compacts the dictionary
+COMPACT_THRESHOLD = 1000
+
+
+class Tombstones:
+    """Words of a dictionary the website does not know.
+
+    They are appended to `<dict>.removed.txt` when saved and filtered out when
+    the dictionary is loaded, so a save never rewrites the dictionary itself.
+    That only happens on `compact`, explicitly or once more than `threshold`
+    words are buried. With a `key` function, burying a word buries every word
+    with the same key.
+
+    Compacted words stay buried in memory until `forget_compacted`: a
+    `Dictionary` mapped before the rewrite still lists them. The compaction a
+    save triggers rewrites the files on a thread, `join` waits for it.
+    """
+
+    def __init__(self, dict_file, threshold=COMPACT_THRESHOLD, key=None):
+        self.dict_file = dict_file
+        self.path = os.path.splitext(dict_file)[0] + ".removed.txt"
+        self.threshold = threshold
+        self.key = key or (lambda word: word)
+        self.words = set()
+        self.compacted = set()
+        self.unsaved = []
+        # Held while the files are written, by `save` and by a compaction's thread
+        self._lock = threading.Lock()
+        self._compaction = None
+        if os.path.exists(self.path):
+            with open(self.path, mode="r", encoding="utf-8") as f:
+                self.words.update(self.key(word) for word in f.read().splitlines() if word)
+
+    def __len__(self):
+        return len(self.words)
+
+    def __contains__(self, word):
+        key = self.key(word)
+        return key in self.words or key in self.compacted
+
+    def add(self, word):
+        if word not in self:
+            self.words.add(self.key(word))
+            self.unsaved.append(word)
+
+    def filter(self, words):
+        """Words of the dictionary that are not buried."""
+        return [word for word in words if word not in self]
+
+    def save(self):
+        if self.unsaved:
+            with self._lock, open(self.path, mode="a", encoding="utf-8") as f:
+                f.write("".join(word + "\n" for word in self.unsaved))
+            self.unsaved = []
+        if len(self.words) > self.threshold:
+            self.compact(background=True)
+
+    def compact(self, background=False):
+        """Rewrite the dictionary without duplicates nor buried words, then drop them from `<dict>.removed.txt`.
+
+        With `background`, the files are rewritten on a thread: only the words
+        buried so far are left out, and words buried meanwhile stay in the file.
+        """
+        self.join()
+        buried = self.words
+        self.compacted |= buried
+        self.words = set()
+        self.unsaved = []
+        if background:
+            self._compaction = threading.Thread(target=self.rewrite, args=(buried,))
+            self._compaction.start()
+        else:
+            self.rewrite(buried)
+
+    def rewrite(self, buried):
+        """Write the dictionary and `<dict>.removed.txt` again without the words whose key is in `buried`."""
+        with self._lock:
+            for path, unique in ((self.dict_file, True), (self.path, False)):
+                if not os.path.exists(path):
+                    continue
+                with open(path, mode="r", encoding="utf-8") as f:
+                    words = f.read().splitlines()
+                words = [word for word in (dict.fromkeys(words) if unique else words) if word and self.key(word) not in buried]
+                with open(path + ".tmp", mode="w", encoding="utf-8") as f:
+                    f.write("".join(word + "\n" for word in words))
+                os.replace(path + ".tmp", path)
+
+    def join(self):
+        """Wait for the compaction running on a thread, if any."""
+        if self._compaction is not None:
+            self._compaction.join()
+            self._compaction = None
+
+    def forget_compacted(self):
+        """Stop burying the compacted words, once the dictionary was opened again without them."""
+        self.compacted = set()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+
+import os
+
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError("Please install numpy with 'pip install numpy' ")
+
+from dictionary import Dictionary
+
+dict_path = 'Dicts'
+
+# Once this many guesses are observed, only the best SHORTLIST_SIZE words stay in the running
+PRUNE_AFTER = 4
+SHORTLIST_SIZE = 16384
+
+
+def vectors_path(language):
+    return f"{dict_path}/{language}.vec.npy"
+
+
+def vocabulary_path(language):
+    return f"{dict_path}/{language}.vec.txt"
+
+
+def open_triangulator(language):
+    """Triangulator over the vectors built by `build_vectors.py`, or None if there are none."""
+    if not os.path.exists(vectors_path(language)) or not os.path.exists(vocabulary_path(language)):
+        return None
+    return Triangulator(vectors_path(language), vocabulary_path(language))
+
+
+class Triangulator:
+    """Ranks a whole vocabulary by how well it explains the scores observed so far.
+
+    Rows of the memory-mapped matrix are unit word vectors. Every observed
+    guess costs one matrix-vector product: the squared gap between each
+    word's cosine to the guess and the similarity the website reported is
+    added to a running error, and the target is whichever word keeps the
+    smallest error across all guesses. After `PRUNE_AFTER` guesses only the
+    `shortlist_size` best words are kept, in memory, so later updates no
+    longer scan the whole vocabulary.
+    """
+
+    def __init__(self, vectors_file, vocabulary_file, shortlist_size=SHORTLIST_SIZE):
+        self.vectors = np.load(vectors_file, mmap_mode='r')
+        self.words = Dictionary(vocabulary_file)
+        if len(self.words) != len(self.vectors):
+            raise ValueError(f"{vectors_file} has {len(self.vectors)} rows for {len(self.words)} words")
+        self.rows = {word: i for i, word in enumerate(self.words)}
+        self.shortlist_size = shortlist_size
+        self.reset()
+
+    def reset(self):
+        """Forget every observation, for a new target."""
+        self.observations = 0
+        # Rows still in the running, their vectors and their error
+        self.active = np.arange(len(self.vectors))
+        self.active_vectors = self.vectors
+        self.error = np.zeros(len(self.vectors), dtype=np.float32)
+
+    def __contains__(self, word):
+        return word in self.rows
+
+    def observe(self, word, similarity):
+        """Account for a scored guess, returns False if the word has no vector."""
+        row = self.rows.get(word)
+        if row is None:
+            return False
+        gap = self.active_vectors @ self.vectors[row] - np.float32(similarity)
+        self.error += gap * gap
+        # A guessed word is never a candidate again
+        self.error[self.active == row] = np.inf
+        self.observations += 1
+
+        if self.observations >= PRUNE_AFTER and len(self.active) > self.shortlist_size:
+            keep = np.sort(np.argpartition(self.error, self.shortlist_size - 1)[:self.shortlist_size])
+            self.active = self.active[keep]
+            self.active_vectors = np.ascontiguousarray(self.active_vectors[keep])
+            self.error = self.error[keep]
+        return True
+
+    def candidates(self, size, exclude=()):
+        """The `size` words with the smallest error, skipping observed ones and those in `exclude`."""
+        k = min(len(self.error), 4 * size)
+        if k == 0:
+            return []
+        best = np.argpartition(self.error, k - 1)[:k]
+        best = best[np.argsort(self.error[best])]
+
+        words = []
+        for i in best:
+            if not np.isfinite(self.error[i]):
+                break
+            word = self.words[int(self.active[i])]
+            if word not in exclude:
+                words.append(word)
+                if len(words) == size:
+                    break
+        return words